@@ -0,0 +1,85 @@
+"""
+추출 모듈 import 시간 벤치마크.
+
+각 모듈을 새 파이썬 프로세스에서 import하고 걸린 시간을 측정한다.
+(이미 import된 모듈 캐시의 영향을 받지 않도록 매번 새 프로세스 사용)
+
+실행 방법:
+    python benchmarks/bench_import_time.py [--repeat 5]
+
+무거운 라이브러리(GA4 proto, BigQuery, gspread, mysql.connector)는 처음 사용할 때 import되므로,
+모듈 import 시간에는 pandas 등 공통 라이브러리 비용만 포함되어야 한다.
+extract.* 가 아닌 행(pandas, gspread 등)은 비교용으로, 해당 라이브러리를 직접 import했을 때의 시간이다.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    'pandas',
+    'extract.extract_utils',
+    'extract.extract_ga4',
+    'extract.extract_bigquery',
+    'extract.extract_sheets',
+    'extract.extract_mysql',
+    'google.analytics.data_v1beta',
+    'google.cloud.bigquery',
+    'gspread',
+    'mysql.connector',
+]
+
+SNIPPET = (
+    "import time; start = time.perf_counter(); import {module}; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure(module, repeat):
+    """
+    module을 repeat번 새 프로세스에서 import하고 걸린 시간(초) 리스트를 반환하는 함수.
+    import에 실패하면 (None, 자식 프로세스의 stderr)를 반환한다.
+    """
+    timings = []
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, '-c', SNIPPET.format(module=module)],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            return None, result.stderr.strip()
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings, None
+
+
+def _failure_label(stderr):
+    """자식 프로세스 stderr의 마지막 줄(예외)로 실패 사유를 정하는 함수 (ModuleNotFoundError만 미설치로 표시)"""
+    last_line = stderr.splitlines()[-1] if stderr else ''
+    if last_line.startswith('ModuleNotFoundError'):
+        return 'import 실패 (미설치)'
+    return 'import 실패'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='추출 모듈 import 시간 측정')
+    parser.add_argument('--repeat', type=int, default=5, help='모듈별 반복 횟수 (기본값: 5)')
+    args = parser.parse_args()
+
+    print(f"{'module':<35}{'median (ms)':>14}{'min (ms)':>12}")
+    for module in TARGETS:
+        timings, stderr = measure(module, args.repeat)
+        if timings is None:
+            print(f"{module:<35}{_failure_label(stderr):>26}")
+            if stderr:
+                print(stderr, file=sys.stderr)
+            continue
+        print(f"{module:<35}{statistics.median(timings) * 1000:>14.1f}{min(timings) * 1000:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""
+transform_utils 변환 함수 처리량 벤치마크.
+
+행 단위 apply / 파이썬 루프로 구현했던 기존 방식과 컬럼 단위(벡터화) 구현의 처리량(행/초)을 비교한다.
+기존 방식은 100만 행에서 수 분이 걸리므로 --baseline-rows 크기의 일부 행으로만 측정한다.
+
+실행 방법:
+    python benchmarks/bench_transform_utils.py [--rows 1000000] [--baseline-rows 20000] [--repeat 3]
+
+마지막 표는 fill → 중복 제거 → 날짜별 집계를 함수로 이어서 호출한 경우와 Pipeline으로 실행한 경우의
+시간과 최대 추가 메모리(tracemalloc 기준)를 비교한다.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from transform.transform_utils import (
+    convert_date_format,
+    calculate_activation_rate,
+    fill_missing_values,
+    remove_duplicates,
+    aggregate_by_date,
+    Pipeline,
+)
+from transform.transform_activation import calculate_activation_rate as calculate_activation_rate_records
+
+
+def make_frame(rows, seed=0):
+    """GA4 응답과 비슷한 형태(YYYYMMDD 날짜, 사용자 수)의 테스트 DataFrame을 만드는 함수"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2023-01-01', periods=730).strftime('%Y%m%d').to_numpy()
+    new_users = rng.integers(0, 1000, rows)
+    return pd.DataFrame({
+        'date': dates[rng.integers(0, len(dates), rows)],
+        'new_users': new_users,
+        'active_users': (new_users * rng.random(rows)).astype('int64'),
+    })
+
+
+# --- 기존 구현 (비교용) ---
+def legacy_convert_date_format(dataframe, column, old_format, new_format):
+    dataframe[column] = dataframe[column].apply(
+        lambda x: pd.to_datetime(x, format=old_format).strftime(new_format)
+    )
+    return dataframe
+
+
+def legacy_activation_rate_records(data):
+    for row in data:
+        row["activation_rate"] = row["active_users"] / row["new_users"] * 100 if row["new_users"] else float('nan')
+    return data
+
+
+def measure(func, make_input, repeat):
+    """make_input()으로 만든 입력에 func을 repeat번 실행하고 가장 빠른 시간(초)을 반환하는 함수"""
+    best = float('inf')
+    for _ in range(repeat):
+        data = make_input()
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def chained_helpers(dataframe):
+    dataframe = fill_missing_values(dataframe, 'new_users', 0)
+    dataframe = fill_missing_values(dataframe, 'active_users', 0)
+    dataframe = remove_duplicates(dataframe, ['date', 'new_users'])
+    return aggregate_by_date(dataframe, 'date', ['new_users', 'active_users'])
+
+
+PIPELINE = (
+    Pipeline()
+    .fill_missing('new_users', 0)
+    .fill_missing('active_users', 0)
+    .drop_duplicates(['date', 'new_users'])
+    .aggregate('date', ['new_users', 'active_users'])
+)
+
+
+def measure_peak(func, make_input):
+    """func 실행 시간(초)과 실행 중 최대 추가 메모리(바이트)를 반환하는 함수"""
+    data = make_input()
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(data)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='transform_utils 처리량 측정')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='벡터화 구현 측정 행 수 (기본값: 1000000)')
+    parser.add_argument('--baseline-rows', type=int, default=20_000, help='기존 구현 측정 행 수 (기본값: 20000)')
+    parser.add_argument('--repeat', type=int, default=3, help='반복 횟수 (기본값: 3)')
+    args = parser.parse_args()
+
+    frame = make_frame(args.rows)
+    baseline = frame.head(args.baseline_rows)
+    records = baseline.to_dict('records')
+
+    cases = [
+        ('convert_date_format (apply)', args.baseline_rows,
+         lambda df: legacy_convert_date_format(df, 'date', '%Y%m%d', '%Y-%m-%d'), baseline.copy),
+        ('convert_date_format', args.rows,
+         lambda df: convert_date_format(df, 'date', '%Y%m%d', '%Y-%m-%d'), frame.copy),
+        ('activation_rate (dict loop)', args.baseline_rows,
+         legacy_activation_rate_records, lambda: [dict(row) for row in records]),
+        ('activation_rate (records)', args.baseline_rows,
+         calculate_activation_rate_records, lambda: [dict(row) for row in records]),
+        ('calculate_activation_rate', args.rows,
+         calculate_activation_rate, frame.copy),
+    ]
+
+    print(f"{'case':<32}{'rows':>12}{'time (s)':>12}{'rows/s':>16}")
+    for name, rows, func, make_input in cases:
+        elapsed = measure(func, make_input, args.repeat)
+        print(f"{name:<32}{rows:>12,}{elapsed:>12.3f}{rows / elapsed:>16,.0f}")
+
+    input_mb = frame.memory_usage(deep=True).sum() / 1024 ** 2
+    print(f"\n{'case':<32}{'time (s)':>12}{'peak (MB)':>12}   (입력 {input_mb:,.0f} MB)")
+    for name, func in [('chained helpers', chained_helpers), ('Pipeline.run', PIPELINE.run)]:
+        elapsed, peak = measure_peak(func, frame.copy)
+        print(f"{name:<32}{elapsed:>12.3f}{peak / 1024 ** 2:>12,.1f}")
+
+
+if __name__ == '__main__':
+    main()
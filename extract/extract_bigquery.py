@@ -1,23 +1,89 @@
-from google.cloud import bigquery
 import pandas as pd
 import os
-from google.oauth2 import service_account
+import threading
+import warnings
+from functools import lru_cache
 from dotenv import load_dotenv
 
+from extract.extract_utils import lazy_import
+
+# BigQuery 관련 라이브러리 (처음 사용할 때 import)
+bigquery = lazy_import('google.cloud.bigquery')
+service_account = lazy_import('google.oauth2.service_account')
+api_exceptions = lazy_import('google.api_core.exceptions')
+
 # 환경 변수 로드
 load_dotenv()
 
-# 서비스 계정 키 파일 경로 가져오기
-key_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 
-if not key_path:
-    raise FileNotFoundError("환경 변수 'GOOGLE_APPLICATION_CREDENTIALS'가 설정되지 않았습니다.")
+@lru_cache(maxsize=1)
+def get_default_credentials():
+    """
+    GOOGLE_APPLICATION_CREDENTIALS의 서비스 계정 키로 기본 Credentials 객체를 만드는 함수.
+    처음 BigQuery를 사용할 때 한 번만 키 파일을 읽는다.
+    """
+    # 서비스 계정 키 파일 경로 가져오기
+    key_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+
+    if not key_path:
+        raise FileNotFoundError("환경 변수 'GOOGLE_APPLICATION_CREDENTIALS'가 설정되지 않았습니다.")
+
+    # Credentials 객체 생성
+    return service_account.Credentials.from_service_account_file(key_path)
+
+
+def __getattr__(name):
+    # 기존 코드의 `default_credentials` 참조도 처음 접근할 때 만들어지도록 함
+    if name == 'default_credentials':
+        return get_default_credentials()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _load_bigquery_storage():
+    """BigQuery Storage Read API 모듈을 불러오는 함수 (패키지가 없으면 None → REST API로 대체)"""
+    try:
+        from google.cloud import bigquery_storage
+    except ImportError:
+        return None
+    return bigquery_storage
+
+
+# 인증 정보별로 재사용하는 클라이언트
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_bigquery_clients(credentials=None):
+    """
+    인증 정보별로 BigQuery 클라이언트와 Storage Read API 클라이언트를 한 번만 만들어 재사용하는 함수.
+
+    Returns:
+    -------
+    tuple(bigquery.Client, bigquery_storage.BigQueryReadClient or None)
+        Storage Read API를 쓸 수 없으면(패키지 미설치, 생성 실패) 두 번째 값은 None.
+    """
+    if credentials is None:
+        credentials = get_default_credentials()
+    key = id(credentials)
+
+    with _clients_lock:
+        if key not in _clients:
+            client = bigquery.Client(credentials=credentials, project=credentials.project_id)
+
+            bqstorage_client = None
+            bigquery_storage = _load_bigquery_storage()
+            if bigquery_storage is not None:
+                try:
+                    bqstorage_client = bigquery_storage.BigQueryReadClient(credentials=credentials)
+                except Exception as error:
+                    warnings.warn(f"BigQuery Storage 클라이언트를 만들 수 없어 REST API로 조회합니다: {error}")
 
+            # credentials 객체를 같이 보관해 id가 다른 객체에 재사용되지 않도록 함
+            _clients[key] = (credentials, client, bqstorage_client)
+        return _clients[key][1], _clients[key][2]
 
-# Credentials 객체 생성
-default_credentials = service_account.Credentials.from_service_account_file(key_path)
 
-def fetch_data_from_bigquery(query, credentials=default_credentials):
+def fetch_data_from_bigquery(query, credentials=None):
     """
     Google BigQuery에서 데이터를 조회하여 pandas DataFrame으로 반환하는 함수.
 
@@ -38,7 +104,7 @@ def fetch_data_from_bigquery(query, credentials=default_credentials):
     google.api_core.exceptions.GoogleAPIError
         BigQuery API 요청 중 발생할 수 있는 오류.
     FileNotFoundError
-        credentials 파일이 설정되지 않았거나 찾을 수 없는 경우 발생.
+        credentials 파일이 설정되지 않았거나 찾을 수 없는 경우 발생 (처음 BigQuery를 사용할 때 확인).
 
     Example:
     --------
@@ -50,15 +116,65 @@ def fetch_data_from_bigquery(query, credentials=default_credentials):
     ------
     - 기본적으로 `GOOGLE_APPLICATION_CREDENTIALS` 환경 변수가 설정되어 있어야 BigQuery 인증이 가능함.
     - credentials를 직접 전달하지 않으면 `default_credentials`를 사용하여 인증함.
+    - 클라이언트는 인증 정보별로 한 번만 만들어 재사용하며, 결과는 BigQuery Storage Read API로
+      Arrow 형식으로 받아옴. (google-cloud-bigquery-storage가 없으면 REST API로 조회)
     """
-    # GCP 클라이언트 객체 생성
-    client = bigquery.Client(credentials=credentials, project=credentials.project_id)
+    # 재사용하는 GCP 클라이언트 객체
+    client, bqstorage_client = get_bigquery_clients(credentials)
 
     # 쿼리 실행
     query_job = client.query(query)
 
-    # 결과를 pandas DataFrame으로 변환
+    # 결과를 pandas DataFrame으로 변환 (Storage Read API가 있으면 Arrow로 병렬 다운로드)
     results = query_job.result()
-    df = results.to_dataframe()
+    try:
+        df = results.to_dataframe(bqstorage_client=bqstorage_client, create_bqstorage_client=False)
+    except api_exceptions.PermissionDenied as error:
+        # Storage Read API 권한(bigquery.readsessions.create)이 없으면 REST API로 다시 조회
+        if bqstorage_client is None:
+            raise
+        warnings.warn(f"BigQuery Storage Read API 권한이 없어 REST API로 조회합니다: {error}")
+        df = results.to_dataframe(create_bqstorage_client=False)
 
     return df
+
+
+def stream_data_from_bigquery(query, credentials=None):
+    """
+    BigQuery 쿼리 결과를 pyarrow.RecordBatch 단위로 나눠서 돌려주는 제너레이터 함수.
+
+    전체 결과를 한 번에 메모리에 올리지 않으므로 수 GB 단위의 이벤트 데이터를 내려받을 때 사용.
+    Storage Read API를 쓸 수 없으면 REST API 페이지 단위로 배치를 돌려준다.
+
+    Parameters:
+    ----------
+    query : str
+        실행할 SQL 쿼리.
+    credentials : google.oauth2.service_account.Credentials, optional
+        BigQuery 인증에 사용할 서비스 계정 객체 (기본값: default_credentials).
+
+    Yields:
+    ------
+    pyarrow.RecordBatch
+        쿼리 결과의 일부.
+
+    Example:
+    --------
+    >>> for batch in stream_data_from_bigquery(query):
+    ...     df = batch.to_pandas()
+    """
+    client, bqstorage_client = get_bigquery_clients(credentials)
+    results = client.query(query).result()
+
+    started = False
+    try:
+        for batch in results.to_arrow_iterable(bqstorage_client=bqstorage_client):
+            started = True
+            yield batch
+    except api_exceptions.PermissionDenied as error:
+        # Storage Read API 권한(bigquery.readsessions.create)이 없으면 REST API로 다시 조회
+        # (이미 돌려준 배치가 있으면 중복되므로 다시 조회하지 않음)
+        if bqstorage_client is None or started:
+            raise
+        warnings.warn(f"BigQuery Storage Read API 권한이 없어 REST API로 조회합니다: {error}")
+        yield from results.to_arrow_iterable()
@@ -1,83 +1,336 @@
+from __future__ import annotations
+
 from datetime import date, timedelta, datetime
+import numpy as np
 import pandas as pd
 from typing import Union, List, Optional
 from dateutil.relativedelta import relativedelta
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import itertools
+import threading
+import warnings
 import os
 
-# GA4관련 라이브러리
-from google.analytics.data_v1beta.types import CohortSpec, CohortsRange, Cohort
-from google.analytics.data_v1beta import BetaAnalyticsDataClient
-from google.analytics.data_v1beta.types import (
-    RunReportRequest,
-    Dimension,
-    Metric,
-    OrderBy,
-    DateRange,
-    FilterExpression,
-    Filter,
-    FilterExpressionList
+from extract.extract_utils import (
+    CACHE_TTL,
+    TokenBucket,
+    state_path,
+    read_frame,
+    write_frame,
+    load_watermark,
+    save_watermark,
+    cache_get,
+    cache_put,
+    lazy_import,
+    retry_with_backoff
 )
-from google.analytics.data_v1beta.types import Filter
+from extract.extract_schema import decode_ga4_dimension, decode_ga4_metric, concat_frames
+
+# GA4관련 라이브러리 (처음 사용할 때 import)
+ga4 = lazy_import('google.analytics.data_v1beta')
+ga4_types = lazy_import('google.analytics.data_v1beta.types')
+ga4_transports = lazy_import('google.analytics.data_v1beta.services.beta_analytics_data.transports')
+api_exceptions = lazy_import('google.api_core.exceptions')
 
 # .env 파일 로드
 load_dotenv()
 
 property_id = os.getenv('GA_PROPERTY_ID')
-os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+if os.getenv('GOOGLE_APPLICATION_CREDENTIALS'):
+    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+
+# GA4 클라이언트 풀 (모든 스레드에서 공유, 첫 사용 시 생성)
+GA4_CLIENT_POOL_SIZE = int(os.getenv('GA4_CLIENT_POOL_SIZE', 4))
+_client_pool = []
+_client_cycle = None
+_client_lock = threading.Lock()
+
+
+def _create_ga4_client() -> ga4.BetaAnalyticsDataClient:
+    """
+    자기만의 TCP 연결을 쓰는 GA4 클라이언트를 생성하는 함수.
+    (gRPC는 기본적으로 채널끼리 서브채널을 공유하므로 로컬 서브채널 풀을 켜야 연결이 분리됨)
+    """
+    channel = ga4_transports.BetaAnalyticsDataGrpcTransport.create_channel(
+        options=[('grpc.use_local_subchannel_pool', 1)]
+    )
+    return ga4.BetaAnalyticsDataClient(transport=ga4_transports.BetaAnalyticsDataGrpcTransport(channel=channel))
+
+
+def get_ga4_client() -> ga4.BetaAnalyticsDataClient:
+    """
+    공유 GA4 클라이언트를 반환하는 함수.
+
+    처음 호출될 때 GA4_CLIENT_POOL_SIZE개의 클라이언트(각각 별도 gRPC 채널)를 만들고,
+    이후에는 라운드로빈으로 돌려가며 반환한다. 클라이언트는 스레드 간에 공유해도 안전하므로
+    main.py의 ThreadPoolExecutor에서 호출해도 채널 생성·인증 비용은 처음 한 번만 든다.
+    """
+    global _client_cycle
+
+    with _client_lock:
+        if not _client_pool:
+            _client_pool.extend(_create_ga4_client() for _ in range(max(1, GA4_CLIENT_POOL_SIZE)))
+            _client_cycle = itertools.cycle(_client_pool)
+        return next(_client_cycle)
+
+
+def configure_ga4_client_pool(pool_size: int):
+    """
+    GA4 클라이언트 풀 크기를 바꾸는 함수. 기존 클라이언트의 gRPC 채널을 닫고, 다음 호출 때 새로 만든다.
+    (진행 중인 요청이 없을 때 호출해야 함)
+    """
+    global GA4_CLIENT_POOL_SIZE, _client_cycle
+
+    with _client_lock:
+        GA4_CLIENT_POOL_SIZE = pool_size
+        for client in _client_pool:
+            client.transport.close()
+        _client_pool.clear()
+        _client_cycle = None
+
+# GA4 요청 스케줄러 설정 (속성별 최대 동시 요청 수, 초당 요청 수)
+GA4_MAX_CONCURRENCY = int(os.getenv('GA4_MAX_CONCURRENCY', 10))
+GA4_REQUESTS_PER_SECOND = float(os.getenv('GA4_REQUESTS_PER_SECOND', 10))
+
+# GA4는 며칠 전 데이터까지 다시 집계하므로, 끝난 지 이 일수가 지나야 결과가 바뀌지 않는다고 봄
+GA4_RESTATEMENT_DAYS = int(os.getenv('GA4_RESTATEMENT_DAYS', 3))
+
+
+class _QuotaScheduler:
+    """
+    GA4 속성(property)별로 동시 요청 수와 요청 속도를 조절하는 스케줄러.
+
+    - 모든 요청에 return_property_quota=True를 붙이고, 응답의 남은 토큰(시간/일/프로젝트 시간 단위)을 추적한다.
+    - 남은 토큰 비율이 50% 아래로 내려가면 동시 요청 수를 비례해서 줄이고,
+      20% 아래에서는 남은 시간 토큰을 한 시간에 나눠 쓰도록 초당 요청 수도 줄인다.
+    - RESOURCE_EXHAUSTED(429)나 일시적인 서버 오류가 나면 동시 요청 수와 초당 요청 수를 절반으로 줄이고 지터 백오프 후 재시도한다.
+      줄인 값은 이후 성공한 응답마다 조금씩(동시 요청 수 +1, 초당 요청 수 ×1.25) 회복한다.
+    """
+
+    def __init__(self, max_concurrency: int = GA4_MAX_CONCURRENCY, requests_per_second: float = GA4_REQUESTS_PER_SECOND):
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests_per_second = requests_per_second
+        self._condition = threading.Condition()
+        self._properties = {}
+
+    def _state(self, property_name: str) -> dict:
+        with self._condition:
+            if property_name not in self._properties:
+                self._properties[property_name] = {
+                    'limit': self.max_concurrency,
+                    'in_flight': 0,
+                    'bucket': TokenBucket(self.requests_per_second, self.max_concurrency),
+                    'capacity': {},
+                    'avg_cost': None,
+                }
+            return self._properties[property_name]
+
+    def run(self, property_name: str, call):
+        """call()을 property_name의 동시 요청 수·속도 제한 안에서 실행하고 응답을 반환하는 함수"""
+        state = self._state(property_name)
+
+        with self._condition:
+            while state['in_flight'] >= state['limit']:
+                self._condition.wait()
+            state['in_flight'] += 1
+
+        def attempt():
+            state['bucket'].acquire()
+            return call()
+
+        try:
+            response = retry_with_backoff(
+                attempt,
+                (api_exceptions.ResourceExhausted, api_exceptions.ServiceUnavailable),
+                on_retry=lambda error: self._on_throttled(state)
+            )
+        finally:
+            with self._condition:
+                state['in_flight'] -= 1
+                self._condition.notify_all()
+
+        self._on_success(state, response)
+        return response
+
+    def _on_throttled(self, state: dict):
+        with self._condition:
+            state['limit'] = max(1, state['limit'] // 2)
+        state['bucket'].set_rate(max(0.1, state['bucket'].rate / 2))
+
+    def _on_success(self, state: dict, response):
+        # batch_run_reports 응답은 마지막 보고서의 할당량 사용
+        reports = getattr(response, 'reports', None)
+        report = reports[-1] if reports else response
+        if 'property_quota' not in report:
+            return
+        quota = report.property_quota
+
+        with self._condition:
+            # 남은 토큰 비율 계산 (관측된 최대 잔량을 전체 한도로 추정)
+            fraction = 1.0
+            for name in ('tokens_per_hour', 'tokens_per_day', 'tokens_per_project_per_hour'):
+                status = getattr(quota, name)
+                total = status.remaining + status.consumed
+                if total <= 0:
+                    continue
+                capacity = state['capacity'][name] = max(state['capacity'].get(name, 0), total)
+                fraction = min(fraction, status.remaining / capacity)
+
+            cost = quota.tokens_per_hour.consumed
+            state['avg_cost'] = cost if state['avg_cost'] is None else 0.8 * state['avg_cost'] + 0.2 * cost
+
+            # 동시 요청 수: 잔량 50% 이상이면 최대치까지 1씩 늘리고, 그 아래에서는 잔량에 비례해 줄임
+            quota_limit = self.max_concurrency if fraction >= 0.5 else max(1, int(self.max_concurrency * fraction * 2))
+            state['limit'] = min(quota_limit, state['limit'] + 1)
+            self._condition.notify_all()
+
+        # 초당 요청 수: 잔량 20% 미만이면 남은 시간 토큰을 한 시간 동안 나눠 쓰도록 조절
+        rate = self.requests_per_second
+        if fraction < 0.2 and state['avg_cost']:
+            rate = max(0.05, min(rate, quota.tokens_per_hour.remaining / state['avg_cost'] / 3600))
+        # 스로틀링으로 줄인 속도는 한 번에 되돌리지 않고 응답마다 25%씩 목표치까지 회복
+        state['bucket'].set_rate(min(rate, state['bucket'].rate * 1.25))
+
+
+_scheduler = _QuotaScheduler()
+
+
+def configure_ga4_scheduler(max_concurrency: int = GA4_MAX_CONCURRENCY, requests_per_second: float = GA4_REQUESTS_PER_SECOND):
+    """GA4 요청 스케줄러의 속성별 최대 동시 요청 수와 초당 요청 수를 바꾸는 함수"""
+    global _scheduler
+    _scheduler = _QuotaScheduler(max_concurrency, requests_per_second)
+
+
+def _run_report(client, request):
+    """할당량 정보를 함께 요청하고, 스케줄러를 거쳐 run_report를 실행하는 함수"""
+    request = type(request)(request)
+    request.return_property_quota = True
+    return _scheduler.run(request.property, lambda: client.run_report(request))
+
 
-def format_report_with_pagination(request, row_limit=100000, page_size=1000):
+def _batch_run_reports(client, request):
+    """스케줄러를 거쳐 batch_run_reports를 실행하는 함수 (하위 요청에 return_property_quota=True를 넣어서 호출)"""
+    return _scheduler.run(request.property, lambda: client.batch_run_reports(request))
+
+
+def _run_page(client, request, offset, page_size):
+    """
+    요청을 복사해 limit/offset만 바꾼 뒤 한 페이지를 요청하는 함수.
+    (원본 request를 건드리지 않으므로 여러 스레드에서 동시에 호출해도 안전)
+    """
+    page_request = type(request)(request)
+    page_request.limit = page_size
+    page_request.offset = offset
+    return _run_report(client, page_request)
+
+
+def _fetch_pages(client, request, row_limit, page_size, concurrent=False, max_workers=4, first=None):
+    """
+    GA4 보고서의 모든 페이지를 offset 순서대로 반환하는 함수.
+
+    concurrent=False이면 이전 페이지가 끝나야 다음 페이지를 요청하고,
+    concurrent=True이면 첫 페이지의 row_count로 남은 offset을 계산해 최대 max_workers개씩 동시에 요청한다.
+    first에 이미 받은 첫 페이지 응답(예: batch_run_reports 결과)을 넘기면 그 다음 페이지부터 요청한다.
+    전체 행 수가 row_limit를 넘으면 일부만 반환된다는 경고를 낸다.
+    """
+    if first is None:
+        first = _run_page(client, request, 0, page_size)
+    responses = [first]
+
+    if first.row_count > row_limit:
+        warnings.warn(
+            f"GA4 보고서 행 수({first.row_count})가 row_limit({row_limit})를 넘어 일부만 반환됩니다. "
+            "create_ga4_request(shard=...)로 날짜 범위를 나눠서 요청하세요."
+        )
+
+    if not concurrent:
+        offset = page_size
+        last = first
+        while offset < row_limit and len(last.rows) == page_size:
+            last = _run_page(client, request, offset, page_size)
+            responses.append(last)
+            offset += page_size
+        return responses
+
+    # 첫 응답의 전체 행 수로 나머지 offset 목록 계산
+    total_rows = min(first.row_count, row_limit)
+    offsets = list(range(page_size, total_rows, page_size))
+    if not offsets:
+        return responses
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(offsets)))) as executor:
+        # executor.map은 입력 순서대로 결과를 돌려주므로 페이지 순서가 유지됨
+        responses.extend(executor.map(lambda offset: _run_page(client, request, offset, page_size), offsets))
+
+    return responses
+
+
+def _decode_response(response) -> pd.DataFrame:
+    """
+    GA4 응답 한 페이지를 컬럼 단위로 디코딩해 DataFrame으로 반환하는 함수.
+
+    헤더는 응답마다 한 번만 해석하고, 컬럼별로 미리 할당한 배열에 문자열 값을 채운 뒤
+    스키마 레지스트리(extract_schema)의 dtype으로 컬럼마다 한 번에 변환한다.
+    (예: platformDeviceCategory → category, activeUsers → int64, date(20240827) → datetime64)
+    """
+    dimension_names = [header.name for header in response.dimension_headers]
+    metric_names = [header.name for header in response.metric_headers]
+    metric_types = [header.type_.name for header in response.metric_headers]
+    rows = response.rows
+    n_rows = len(rows)
+
+    # 컬럼별 배열 미리 할당
+    dimension_columns = [np.empty(n_rows, dtype=object) for _ in dimension_names]
+    metric_columns = [np.empty(n_rows, dtype=object) for _ in metric_names]
+
+    for r, row in enumerate(rows):
+        for column, value in zip(dimension_columns, row.dimension_values):
+            column[r] = value.value
+        for column, value in zip(metric_columns, row.metric_values):
+            column[r] = value.value
+
+    data = {
+        name: decode_ga4_dimension(name, values)
+        for name, values in zip(dimension_names, dimension_columns)
+    }
+    data.update(
+        (name, decode_ga4_metric(name, values, metric_type))
+        for name, values, metric_type in zip(metric_names, metric_columns, metric_types)
+    )
+
+    return pd.DataFrame(data, columns=dimension_names + metric_names)
+
+
+def format_report_with_pagination(request, row_limit=100000, page_size=1000, concurrent=False, max_workers=4):
     """
     #GA4 응답 데이터를 DataFrame으로 변환하는 함수 (페이징 포함)
+
+    concurrent=True이면 첫 페이지 이후의 페이지를 최대 max_workers개씩 동시에 요청한다.
+    컬럼 dtype은 스키마 레지스트리를 따른다. ('date'는 datetime64, 개수 측정항목은 int64, 디바이스 등은 category)
     """
-    client = BetaAnalyticsDataClient()
-    all_data = []
-    offset = 0
-    
-    while offset < row_limit:
-        # 각 페이지에 대해 limit와 offset을 설정하여 요청
-        request.limit = page_size
-        request.offset = offset
-        
-        # GA4 데이터 요청
-        response = client.run_report(request)
-        
-        # 행 데이터를 추출하여 리스트에 추가
-        for row in response.rows:
-            row_data = {dim.name: row.dimension_values[i].value for i, dim in enumerate(response.dimension_headers)}
-            row_data.update({metric.name: float(row.metric_values[i].value) for i, metric in enumerate(response.metric_headers)})
-
-            # 날짜 형식 변환 (20240827 -> 2024-08-27)
-            if 'date' in row_data:
-                original_date = row_data['date']
-                formatted_date = f"{original_date[:4]}-{original_date[4:6]}-{original_date[6:]}"
-                row_data['date'] = formatted_date
-
-            all_data.append(row_data)
-        
-        # 다음 페이지로 이동
-        offset += page_size
-        
-        # 모든 데이터가 다 불러와졌으면 중지
-        if len(response.rows) < page_size:
-            break
-    
-    return pd.DataFrame(all_data)
+    client = get_ga4_client()
+    responses = _fetch_pages(client, request, row_limit, page_size, concurrent, max_workers)
+
+    # 페이지별로 컬럼 단위 디코딩 후 한 번에 이어붙임
+    frames = [_decode_response(response) for response in responses]
+    return concat_frames(frames)
 
 
-def calculate_date_range(default_dimension: str, start: int = None) -> List[DateRange]:
+def calculate_date_range(default_dimension: str, start: int = None) -> List[ga4_types.DateRange]:
     """
     날짜 범위를 계산하여 반환. default_dimension에 따라 다른 방식으로 계산.
     """
     today = date.today()
 
     if default_dimension == 'date':
-        return [DateRange(
+        return [ga4_types.DateRange(
             start_date=(today - timedelta(days=start)).strftime('%Y-%m-%d'),
             end_date=today.strftime('%Y-%m-%d')
         )]
     elif default_dimension == 'yearMonth':
-        return [DateRange(
+        return [ga4_types.DateRange(
             start_date=f'{today.replace(day=1).strftime("%Y-%m-%d")}',
             end_date=today.strftime('%Y-%m-%d')
         )]
@@ -88,8 +341,14 @@ def create_ga4_request(
     dimensions: Union[str, List[str]] = None,
     metrics: Union[str, List[str]] = None,
     start: int = None,
-    dimension_filter: FilterExpression = None,
-    default_dimension: str = 'date'
+    dimension_filter: ga4_types.FilterExpression = None,
+    default_dimension: str = 'date',
+    concurrent: bool = False,
+    incremental: bool = False,
+    restatement_days: int = GA4_RESTATEMENT_DAYS,
+    cache: bool = True,
+    shard: Optional[str] = None,
+    shard_workers: int = 4
 ) -> pd.DataFrame:
     """
     GA4 데이터를 요청하고 Pandas DataFrame으로 반환하는 함수.
@@ -109,6 +368,19 @@ def create_ga4_request(
                                           필터가 없으면 전체 데이터가 반환됨.
     default_dimension (str): 기본 측정기준 (예: 'date', 'yearMonth').
                              기본값은 'date'이며, 데이터를 날짜별로 집계.
+    concurrent (bool): True이면 첫 페이지의 row_count를 보고 나머지 페이지를 동시에 요청.
+                       행이 많은 보고서(예: firstUserSourceMedium × date)에서 사용.
+    incremental (bool): True이면 요청별 워터마크(마지막 추출일) 이후 날짜와 재집계 기간만 요청하고,
+                        저장된 누적 데이터와 합쳐서 반환. default_dimension='date'에서만 사용 가능.
+    restatement_days (int): 증분 추출 시 워터마크까지의 마지막 며칠을 다시 요청할지 (GA4 지연 데이터 반영, 기본값: 3).
+                            캐시에서도 끝난 지 restatement_days일이 지나지 않은 날짜 범위는 확정되지 않은 것으로 봄.
+    cache (bool): True이면 같은 요청(필터·측정기준·측정항목·날짜 범위)의 결과를 디스크 캐시에서 재사용.
+                  저장할 때 이미 확정된(restatement_days일 전에 끝난) 날짜 범위는 만료 없이,
+                  그 외에는 ETL_CACHE_TTL 동안 재사용.
+    shard (str, optional): 날짜 범위를 나눠서 동시에 요청할 단위 ('day', 'week', 'adaptive').
+                           'adaptive'는 전체 row_count를 먼저 조회해 조각당 약 SHARD_TARGET_ROWS행이 되도록 나눔.
+                           행이 row_limit를 넘거나 샘플링되는 큰 보고서에서 사용. 측정기준에 'date'가 있어야 함.
+    shard_workers (int): 동시에 요청할 날짜 조각 수 (기본값: 4).
 
     Returns:
     pd.DataFrame: GA4에서 반환된 데이터를 Pandas DataFrame으로 변환한 결과.
@@ -135,53 +407,328 @@ def create_ga4_request(
     # 결과 출력
     print(df.head())
     """
+    request = build_ga4_request(dimensions, metrics, start, dimension_filter, default_dimension)
+
+    if incremental:
+        if default_dimension != 'date':
+            raise ValueError("incremental=True는 default_dimension='date'에서만 사용할 수 있습니다.")
+        return _incremental_report(request, restatement_days, concurrent, cache, shard, shard_workers)
+
+    return _fetch_report(request, concurrent, cache, shard, shard_workers, restatement_days)
+
+
+def _request_key(request, include_date_ranges: bool = True) -> str:
+    """
+    GA4 요청 내용을 직렬화해 만든 해시값을 반환하는 함수.
+    include_date_ranges=False이면 날짜 범위를 뺀 요청 정의(측정기준, 측정항목, 필터 등)만으로 키를 만든다.
+    """
+    key_request = type(request)(request)
+    key_request.limit = 0
+    key_request.offset = 0
+    if not include_date_ranges:
+        key_request.date_ranges = []
+    serialized = type(request).pb(key_request).SerializeToString(deterministic=True)
+    return hashlib.sha256(serialized).hexdigest()
+
+
+def _is_closed_request(request, restatement_days: int = GA4_RESTATEMENT_DAYS) -> bool:
+    """
+    요청한 날짜 범위가 모두 restatement_days일보다 전에 끝나서 결과가 더 이상 바뀌지 않는지 확인하는 함수.
+    (GA4는 늦게 들어온 데이터를 며칠 동안 다시 집계함)
+    """
+    if request.cohort_spec.cohorts:
+        # 코호트 보고서는 이후 기간 값이 계속 채워지므로 항상 TTL 적용
+        return False
+    today = date.today()
+    return bool(request.date_ranges) and all(
+        date.fromisoformat(dr.end_date) + timedelta(days=restatement_days) < today
+        for dr in request.date_ranges
+    )
+
+
+def _read_through_cache(request, fetch, cache: bool = True, restatement_days: int = GA4_RESTATEMENT_DAYS) -> pd.DataFrame:
+    """
+    요청 해시를 키로 디스크 캐시를 먼저 확인하고, 없으면 fetch()를 실행해 결과를 저장하는 함수.
+
+    확정 여부는 읽을 때가 아니라 저장할 때 정한다. 저장할 때 이미 확정된 날짜 범위의 결과는
+    '<키>_closed'에 만료 없이 저장하고, 그 외(오늘이나 재집계 기간이 포함된 범위)는 CACHE_TTL 동안만 재사용한다.
+    (오늘 받은 하루치 일부 데이터가 다음 날 확정된 결과로 재사용되지 않도록)
+    """
+    if not cache:
+        return fetch()
+
+    key = _request_key(request)
+    closed_key = f'{key}_closed'
+    df = cache_get(closed_key, ttl=None)
+    if df is None:
+        df = cache_get(key, ttl=CACHE_TTL)
+    if df is None:
+        closed = _is_closed_request(request, restatement_days)
+        df = fetch()
+        cache_put(closed_key if closed else key, df)
+    return df
+
+
+def _cached_report(request, concurrent: bool = False, cache: bool = True, restatement_days: int = GA4_RESTATEMENT_DAYS) -> pd.DataFrame:
+    """format_report_with_pagination 결과를 디스크 캐시를 거쳐 반환하는 함수"""
+    return _read_through_cache(
+        request, lambda: format_report_with_pagination(request, concurrent=concurrent), cache, restatement_days
+    )
+
+
+SHARD_TARGET_ROWS = 20000  # shard='adaptive'일 때 날짜 조각 하나에 담을 목표 행 수
+
+
+def _shard_date_ranges(start_date: date, end_date: date, shard_days: int) -> List[ga4_types.DateRange]:
+    """start_date ~ end_date를 shard_days일 단위의 DateRange 리스트로 나누는 함수"""
+    date_ranges = []
+    shard_start = start_date
+    while shard_start <= end_date:
+        shard_end = min(shard_start + timedelta(days=shard_days - 1), end_date)
+        date_ranges.append(ga4_types.DateRange(start_date=shard_start.strftime('%Y-%m-%d'), end_date=shard_end.strftime('%Y-%m-%d')))
+        shard_start = shard_end + timedelta(days=1)
+    return date_ranges
+
+
+def _sharded_report(
+    request,
+    shard: str,
+    concurrent: bool = False,
+    cache: bool = True,
+    max_workers: int = 4,
+    restatement_days: int = GA4_RESTATEMENT_DAYS
+) -> pd.DataFrame:
+    """
+    요청의 날짜 범위를 shard 단위로 나눠 동시에 요청하고, 날짜 순서대로 이어붙여 반환하는 함수.
+    날짜별로 나뉜 행끼리는 겹치지 않으므로 'date' 측정기준이 있을 때만 사용할 수 있다.
+    """
+    if 'date' not in [dim.name for dim in request.dimensions]:
+        raise ValueError("shard는 측정기준에 'date'가 있는 요청에서만 사용할 수 있습니다.")
+    if len(request.date_ranges) != 1:
+        raise ValueError("shard는 날짜 범위가 하나인 요청에서만 사용할 수 있습니다.")
+
+    start_date = date.fromisoformat(request.date_ranges[0].start_date)
+    end_date = date.fromisoformat(request.date_ranges[0].end_date)
+    n_days = (end_date - start_date).days + 1
+
+    if shard == 'day':
+        shard_days = 1
+    elif shard == 'week':
+        shard_days = 7
+    elif shard == 'adaptive':
+        # limit=1로 전체 행 수만 먼저 확인해서 조각 크기 결정
+        row_count = _run_page(get_ga4_client(), request, 0, 1).row_count
+        rows_per_day = max(row_count / n_days, 1)
+        shard_days = max(1, int(SHARD_TARGET_ROWS // rows_per_day))
+    else:
+        raise ValueError(f"지원하지 않는 shard 값입니다: {shard} ('day', 'week', 'adaptive' 중 선택)")
+
+    shard_requests = []
+    for date_range in _shard_date_ranges(start_date, end_date, shard_days):
+        shard_request = type(request)(request)
+        shard_request.date_ranges = [date_range]
+        shard_requests.append(shard_request)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(shard_requests)))) as executor:
+        frames = list(executor.map(lambda r: _cached_report(r, concurrent, cache, restatement_days), shard_requests))
+
+    df = concat_frames(frames)
+    return df.sort_values('date', kind='stable', ignore_index=True)
+
+
+def _fetch_report(
+    request,
+    concurrent: bool = False,
+    cache: bool = True,
+    shard: Optional[str] = None,
+    shard_workers: int = 4,
+    restatement_days: int = GA4_RESTATEMENT_DAYS
+) -> pd.DataFrame:
+    """shard 여부에 따라 날짜 범위를 나눠서 또는 한 번에 요청하는 함수"""
+    if shard:
+        return _sharded_report(request, shard, concurrent, cache, shard_workers, restatement_days)
+    return _cached_report(request, concurrent, cache, restatement_days)
+
+
+def _incremental_report(
+    request,
+    restatement_days: int,
+    concurrent: bool,
+    cache: bool = True,
+    shard: Optional[str] = None,
+    shard_workers: int = 4
+) -> pd.DataFrame:
+    """
+    워터마크 이후 날짜(+ 재집계 기간)만 요청해 저장된 누적 데이터에 합치고,
+    원래 요청한 날짜 범위의 데이터를 반환하는 함수.
+
+    누적 데이터가 시작하는 날짜도 함께 저장해 두고, 요청 범위가 그보다 앞에서 시작하면
+    (예: start=7로 쌓은 뒤 start=30으로 요청) 앞쪽 빈 구간을 추가로 요청해 채운다.
+    """
+    key = _request_key(request, include_date_ranges=False)
+    start_key = f'{key}:start'
+    history_path = state_path('ga4_history', f'{key}.parquet')
+
+    window_start = date.fromisoformat(request.date_ranges[0].start_date)
+    window_end = date.fromisoformat(request.date_ranges[0].end_date)
+
+    history = read_frame(history_path)
+    watermark = load_watermark(key)
+    covered_start = load_watermark(start_key)
+    if history is None or watermark is None or covered_start is None:
+        history, watermark, covered_start = None, None, None
+
+    # 요청할 구간 목록: (앞쪽 빈 구간), (워터마크 다음 날부터, 마지막 restatement_days일은 다시 요청)
+    fetch_ranges = []
+    fetch_start = window_start
+    if history is not None:
+        fetch_start = max(window_start, watermark + timedelta(days=1 - restatement_days))
+        backfill_end = min(covered_start, fetch_start) - timedelta(days=1)
+        if window_start <= backfill_end:
+            fetch_ranges.append((window_start, backfill_end))
+    if fetch_start <= window_end:
+        fetch_ranges.append((fetch_start, window_end))
+
+    if fetch_ranges:
+        frames = [] if history is None else [history]
+        for range_start, range_end in fetch_ranges:
+            fetch_request = type(request)(request)
+            fetch_request.date_ranges = [ga4_types.DateRange(start_date=range_start.strftime('%Y-%m-%d'), end_date=range_end.strftime('%Y-%m-%d'))]
+            frames.append(_fetch_report(fetch_request, concurrent, cache, shard, shard_workers, restatement_days))
+
+            # 다시 받은 날짜 구간은 새 데이터로 교체
+            if history is not None:
+                frames[0] = frames[0][(frames[0]['date'] < pd.Timestamp(range_start)) | (frames[0]['date'] > pd.Timestamp(range_end))]
+        history = concat_frames(frames).sort_values('date', kind='stable', ignore_index=True)
+
+    write_frame(history, history_path)
+    save_watermark(key, max(window_end, watermark or window_end))
+    save_watermark(start_key, min(window_start, covered_start or window_start))
+
+    in_window = (history['date'] >= pd.Timestamp(window_start)) & (history['date'] <= pd.Timestamp(window_end))
+    return history[in_window].reset_index(drop=True)
+
+
+def build_ga4_request(
+    dimensions: Union[str, List[str]] = None,
+    metrics: Union[str, List[str]] = None,
+    start: int = None,
+    dimension_filter: ga4_types.FilterExpression = None,
+    default_dimension: str = 'date'
+) -> ga4_types.RunReportRequest:
+    """
+    create_ga4_request와 같은 인자로 GA4 RunReportRequest 객체만 만들어 반환하는 함수.
+    (요청은 실행하지 않음. 배치 요청 등에서 재사용)
+    """
     global property_id  # 전역 변수 사용 선언
 
-    # dimensions와 metrics 처리
+    # dimensions와 metrics 처리 (호출한 쪽의 리스트를 바꾸지 않도록 복사)
     if isinstance(dimensions, str):
         dimensions = [dimensions]
     if isinstance(metrics, str):
         metrics = [metrics]
-    dimensions = dimensions or [default_dimension]
-    metrics = metrics or []
+    dimensions = list(dimensions or [default_dimension])
+    metrics = list(metrics or [])
 
     # 기본 dimension 추가
     if default_dimension not in dimensions:
         dimensions.insert(0, default_dimension)
 
     # Dimension, Metric 객체 생성
-    dimension_objects = [Dimension(name=dim) for dim in dimensions]
-    metric_objects = [Metric(name=met) for met in metrics]
+    dimension_objects = [ga4_types.Dimension(name=dim) for dim in dimensions]
+    metric_objects = [ga4_types.Metric(name=met) for met in metrics]
 
     # 날짜 범위 계산
     date_ranges = calculate_date_range(default_dimension, start)
 
     # GA4 요청 생성
-    request = RunReportRequest(
+    return ga4_types.RunReportRequest(
         property=f'properties/{property_id}',
         dimensions=dimension_objects,
         metrics=metric_objects,
-        order_bys=[OrderBy(dimension={'dimension_name': default_dimension})],
+        order_bys=[ga4_types.OrderBy(dimension={'dimension_name': default_dimension})],
         date_ranges=date_ranges,
         dimension_filter=dimension_filter
     )
 
-    return format_report_with_pagination(request)
 
+def batch_create_ga4_requests(
+    configs: List[dict],
+    row_limit: int = 100000,
+    page_size: int = 1000,
+    batch_size: int = 5
+) -> List[pd.DataFrame]:
+    """
+    여러 GA4 요청을 batch_run_reports로 묶어서 실행하고, 설정별 DataFrame 리스트를 반환하는 함수.
+
+    같은 속성(property)과 같은 날짜 범위를 가진 요청끼리 최대 batch_size(GA4 최대 5)개씩 묶어
+    한 번의 API 호출로 보낸다. 첫 페이지보다 행이 많은 보고서는 나머지 페이지만 따로 요청한다.
+
+    Args:
+    configs (List[dict]): create_ga4_request의 인자(dimensions, metrics, start,
+                          dimension_filter, default_dimension)를 담은 딕셔너리 리스트.
+    row_limit (int): 보고서 하나당 가져올 최대 행 수.
+    page_size (int): 한 페이지에 요청할 행 수.
+    batch_size (int): 한 번에 묶을 요청 수 (1~5).
+
+    Returns:
+    List[pd.DataFrame]: configs와 같은 순서의 DataFrame 리스트.
+
+    Example Usage:
+    --------------
+    dau, mau = batch_create_ga4_requests([
+        {'dimensions': 'platformDeviceCategory', 'metrics': 'activeUsers', 'start': 30},
+        {'dimensions': 'platformDeviceCategory', 'metrics': 'active28DayUsers', 'start': 30},
+    ])
+    """
+    batch_size = max(1, min(batch_size, 5))
+    requests = [build_ga4_request(**config) for config in configs]
+
+    # 속성과 날짜 범위가 같은 요청끼리 그룹화 (요청 순서 유지)
+    groups = {}
+    for index, request in enumerate(requests):
+        key = (request.property, tuple((dr.start_date, dr.end_date) for dr in request.date_ranges))
+        groups.setdefault(key, []).append(index)
+
+    client = get_ga4_client()
+    results = [None] * len(requests)
+
+    for (property_name, _), indices in groups.items():
+        for i in range(0, len(indices), batch_size):
+            batch_indices = indices[i:i + batch_size]
+
+            # 각 요청의 첫 페이지를 한 번의 호출로 받음
+            sub_requests = []
+            for index in batch_indices:
+                sub_request = type(requests[index])(requests[index])
+                sub_request.limit = page_size
+                sub_request.offset = 0
+                sub_request.return_property_quota = True
+                sub_requests.append(sub_request)
+
+            response = _batch_run_reports(
+                client,
+                ga4_types.BatchRunReportsRequest(property=property_name, requests=sub_requests)
+            )
+
+            # 응답을 요청별로 나누고, 남은 페이지가 있으면 이어서 요청
+            for index, report in zip(batch_indices, response.reports):
+                pages = _fetch_pages(client, requests[index], row_limit, page_size, first=report)
+                results[index] = concat_frames(_decode_response(page) for page in pages)
+
+    return results
 
-from typing import List, Optional, Union
-from google.analytics.data_v1beta.types import Filter, FilterExpression, FilterExpressionList
 
 def create_dimension_filter(
     field1: str, 
     values1: str, 
     field2: Optional[str] = None,  
     values2: Optional[Union[str, str]] = None,  
-    match_type1: Filter.StringFilter.MatchType = Filter.StringFilter.MatchType.EXACT, 
-    match_type2: Filter.StringFilter.MatchType = Filter.StringFilter.MatchType.EXACT,
+    match_type1: Optional[ga4_types.Filter.StringFilter.MatchType] = None, 
+    match_type2: Optional[ga4_types.Filter.StringFilter.MatchType] = None,
     exclude1: bool = False,
     exclude2: bool = False
-) -> FilterExpression:
+) -> ga4_types.FilterExpression:
     """
     GA4 측정기준 필터를 동적으로 생성하는 함수.
 
@@ -203,6 +750,12 @@ def create_dimension_filter(
     if values2 is None:
         values2 = []
 
+    # 매치 타입 기본값 (GA4 라이브러리를 처음 사용할 때 불러오도록 함수 안에서 지정)
+    if match_type1 is None:
+        match_type1 = ga4_types.Filter.StringFilter.MatchType.EXACT
+    if match_type2 is None:
+        match_type2 = ga4_types.Filter.StringFilter.MatchType.EXACT
+
     # # 단일 문자열을 리스트로 변환
     # if isinstance(values1, str):
     #     values1 = [values1]
@@ -210,13 +763,13 @@ def create_dimension_filter(
     #     values2 = [values2]
 
     # 필터1 생성
-    filter1_expression = FilterExpression(
-        or_group=FilterExpressionList(
+    filter1_expression = ga4_types.FilterExpression(
+        or_group=ga4_types.FilterExpressionList(
             expressions=[
-                FilterExpression(
-                    filter=Filter(
+                ga4_types.FilterExpression(
+                    filter=ga4_types.Filter(
                         field_name=field1,
-                        string_filter=Filter.StringFilter(value=values1, match_type=match_type1)
+                        string_filter=ga4_types.Filter.StringFilter(value=values1, match_type=match_type1)
                     )
                 )
             ]
@@ -224,12 +777,12 @@ def create_dimension_filter(
     )
 
     # not 조건 필터1 생성
-    filter1_not_expression = FilterExpression(
+    filter1_not_expression = ga4_types.FilterExpression(
         not_expression =
-            FilterExpression(
-                filter=Filter(
+            ga4_types.FilterExpression(
+                filter=ga4_types.Filter(
                     field_name=field1,
-                    string_filter=Filter.StringFilter(value=values1, match_type=match_type1)
+                    string_filter=ga4_types.Filter.StringFilter(value=values1, match_type=match_type1)
                 )
             )
         )
@@ -239,13 +792,13 @@ def create_dimension_filter(
 
     # 필터2 생성 (필드가 존재하고 값이 있을 경우만)
     if field2 and values2:
-        filter2_expression = FilterExpression(
-            or_group=FilterExpressionList(
+        filter2_expression = ga4_types.FilterExpression(
+            or_group=ga4_types.FilterExpressionList(
                 expressions=[
-                    FilterExpression(
-                        filter=Filter(
+                    ga4_types.FilterExpression(
+                        filter=ga4_types.Filter(
                             field_name=field2,
-                            string_filter=Filter.StringFilter(value=value, match_type=match_type2)
+                            string_filter=ga4_types.Filter.StringFilter(value=value, match_type=match_type2)
                         )
                     ) for value in values2
                 ]
@@ -253,14 +806,14 @@ def create_dimension_filter(
         )
 
         # not 조건 필터2 생성
-        filter2_not_expression = FilterExpression(
-            not_expression=FilterExpression(
-                or_group=FilterExpressionList(
+        filter2_not_expression = ga4_types.FilterExpression(
+            not_expression=ga4_types.FilterExpression(
+                or_group=ga4_types.FilterExpressionList(
                     expressions=[
-                        FilterExpression(
-                            filter=Filter(
+                        ga4_types.FilterExpression(
+                            filter=ga4_types.Filter(
                                 field_name=field2,
-                                string_filter=Filter.StringFilter(value=value, match_type=match_type2)
+                                string_filter=ga4_types.Filter.StringFilter(value=value, match_type=match_type2)
                             )
                         ) for value in values2
                     ]
@@ -271,8 +824,8 @@ def create_dimension_filter(
         filter2 = filter2_not_expression if exclude2 else filter2_expression
 
         # 필터1과 필터2 결합
-        combined_filter = FilterExpression(
-            and_group=FilterExpressionList(
+        combined_filter = ga4_types.FilterExpression(
+            and_group=ga4_types.FilterExpressionList(
                 expressions=[filter1, filter2]
             )
         )
@@ -282,8 +835,77 @@ def create_dimension_filter(
     return combined_filter
 
 
+def _build_cohort_matrix(report: pd.DataFrame, cohort_dimension: str, col_name: str, end_offset: int, platform: bool = False):
+    """
+    디코딩된 코호트 응답(cohort, cohortNth*, cohortActiveUsers 컬럼)을 코호트 행렬로 한 번에 변환하는 함수.
+
+    platform=False이면 cohort_date를 인덱스로 하는 DataFrame을, platform=True이면
+    {디바이스 카테고리: DataFrame} 딕셔너리를 반환한다. 값이 없는 칸은 0으로 채운다.
+    """
+    cohort_codes, cohort_labels = pd.factorize(report['cohort'], sort=True)
+    offsets = report[cohort_dimension].astype(np.int64).to_numpy()
+    values = report['cohortActiveUsers'].to_numpy(dtype=np.int64)
+
+    if platform:
+        device_codes, devices = pd.factorize(report['platformDeviceCategory'])
+        columns = [f'{col_name} {n}' for n in range(end_offset + 1)]
+
+        # (디바이스, 코호트, 기간) 3차원 배열에 한 번에 채움
+        matrix = np.zeros((len(devices), len(cohort_labels), end_offset + 1), dtype=np.int64)
+        matrix[device_codes, cohort_codes, offsets] = values
+
+        # 디바이스별로 실제 데이터가 있는 코호트만 남김
+        present = np.zeros((len(devices), len(cohort_labels)), dtype=bool)
+        present[device_codes, cohort_codes] = True
+
+        return {
+            device: pd.DataFrame(
+                matrix[d][present[d]],
+                index=pd.Index(cohort_labels[present[d]], name='cohort_date'),
+                columns=columns
+            )
+            for d, device in enumerate(devices)
+        }
+
+    if len(report) == 0:
+        return pd.DataFrame(index=pd.Index([], name='cohort_date'))
+
+    matrix = np.zeros((len(cohort_labels), offsets.max() + 1), dtype=np.int64)
+    matrix[cohort_codes, offsets] = values
+
+    # 응답에 나온 기간만 컬럼으로 사용 (Month 0, Month 1, ..., Month 12)
+    present_offsets = np.unique(offsets)
+    return pd.DataFrame(
+        matrix[:, present_offsets],
+        index=pd.Index(cohort_labels, name='cohort_date'),
+        columns=[f'{col_name} {n}' for n in present_offsets]
+    )
+
+
+def _cohort_period_end(end_date: str, granularity: str, end_offset: int) -> date:
+    """코호트의 마지막 기간(end_offset)이 끝나는 날짜를 반환하는 함수"""
+    next_day = date.fromisoformat(end_date) + timedelta(days=1)
+    if granularity == 'DAILY':
+        return next_day + timedelta(days=end_offset) - timedelta(days=1)
+    if granularity == 'WEEKLY':
+        return next_day + timedelta(weeks=end_offset) - timedelta(days=1)
+    return next_day + relativedelta(months=end_offset) - timedelta(days=1)
+
+
 # 리텐션 데이터
-def retention(platform: bool = False, date_format: str = 'day', end_offset: int = 1, before_month: int = 12):
+MAX_COHORTS_PER_REQUEST = 12  # GA4 요청 하나에 넣을 수 있는 최대 코호트 수
+
+def retention(
+    platform: bool = False,
+    date_format: str = 'day',
+    end_offset: int = 1,
+    before_month: int = 12,
+    cache: bool = True,
+    cohort_chunk_size: int = MAX_COHORTS_PER_REQUEST,
+    max_workers: int = 4,
+    incremental: bool = False,
+    restatement_days: int = 3
+):
     """
     Google Analytics 4 (GA4) 코호트 유지율 분xw석을 위한 함수.
     
@@ -304,6 +926,22 @@ def retention(platform: bool = False, date_format: str = 'day', end_offset: int
     before_month : int, optional
         분석 시작일 기준으로 몇 개월 전부터 데이터를 가져올지 설정 (기본값: 12개월)
 
+    cache : bool, optional
+        True일 경우, 같은 요청 결과를 ETL_CACHE_TTL 동안 디스크 캐시에서 재사용 (기본값: True)
+
+    cohort_chunk_size : int, optional
+        요청 하나에 넣을 코호트 수. GA4 제한(MAX_COHORTS_PER_REQUEST)보다 크면 제한값으로 맞춤 (기본값: 12)
+
+    max_workers : int, optional
+        나눠진 코호트 요청을 동시에 실행할 스레드 수 (기본값: 4)
+
+    incremental : bool, optional
+        True일 경우, 저장된 코호트 데이터 중 마지막 기간(end_offset)까지 끝난 코호트는 재사용하고
+        아직 값이 채워지는 코호트와 새로 시작된 코호트만 요청 (기본값: False)
+
+    restatement_days : int, optional
+        증분 모드에서 마지막 기간이 끝난 뒤 며칠이 더 지나야 코호트를 확정으로 볼지 (기본값: 3)
+
     Returns:
     --------
     pandas.DataFrame or dict of pandas.DataFrame
@@ -330,8 +968,8 @@ def retention(platform: bool = False, date_format: str = 'day', end_offset: int
     # Google Analytics 4 속성 ID 설정
     global property_id
 
-    # GA4 클라이언트 생성
-    client = BetaAnalyticsDataClient()
+    # 공유 GA4 클라이언트 사용
+    client = get_ga4_client()
     today = date.today()
 
     if date_format == 'day':
@@ -367,93 +1005,76 @@ def retention(platform: bool = False, date_format: str = 'day', end_offset: int
 
     # Cohort 객체 생성
     cohorts = [
-        Cohort(
+        ga4_types.Cohort(
             name=label,
             dimension='firstSessionDate',
-            date_range=DateRange(start_date=start, end_date=end)
+            date_range=ga4_types.DateRange(start_date=start, end_date=end)
         )
         for label, start, end in zip(cohort_labels, start_dates, end_dates)
     ]
 
     # 요청 생성 (platform 여부에 따라 다르게 설정)
     dimensions = [
-        Dimension(name="cohort"),
-        Dimension(name=cohort_demention)
+        ga4_types.Dimension(name="cohort"),
+        ga4_types.Dimension(name=cohort_demention)
     ]
     
     if platform:
-        dimensions.insert(0, Dimension(name="platformDeviceCategory"))
-
-    request = RunReportRequest(
-        property=f"properties/{property_id}",
-        dimensions=dimensions,
-        metrics=[
-            Metric(name="cohortActiveUsers")
-        ],
-        cohort_spec=CohortSpec(
-            cohorts=cohorts,
-            cohorts_range=CohortsRange(granularity=granularity, end_offset=end_offset),
+        dimensions.insert(0, ga4_types.Dimension(name="platformDeviceCategory"))
+
+    # 증분 모드: 이미 확정된 코호트는 저장된 데이터를 재사용
+    reusable_labels = set()
+    if incremental:
+        key = hashlib.sha256(f'{property_id}|{platform}|{date_format}|{end_offset}'.encode()).hexdigest()
+        stored_path = state_path('ga4_retention', f'{key}.parquet')
+        fetched_path = state_path('ga4_retention', f'{key}_cohorts.parquet')
+        stored = read_frame(stored_path)
+        fetched = read_frame(fetched_path)
+
+        if stored is not None and fetched is not None:
+            closed_labels = {
+                label for label, end in zip(cohort_labels, end_dates)
+                if _cohort_period_end(end, granularity, end_offset) + timedelta(days=restatement_days) < today
+            }
+            reusable_labels = closed_labels & set(fetched['cohort'])
+
+        cohorts = [cohort for cohort in cohorts if cohort.name not in reusable_labels]
+
+    # 코호트를 API 제한 크기로 나눠 요청 여러 개 생성
+    cohort_chunk_size = max(1, min(cohort_chunk_size, MAX_COHORTS_PER_REQUEST))
+    requests = [
+        ga4_types.RunReportRequest(
+            property=f"properties/{property_id}",
+            dimensions=dimensions,
+            metrics=[
+                ga4_types.Metric(name="cohortActiveUsers")
+            ],
+            cohort_spec=ga4_types.CohortSpec(
+                cohorts=cohorts[i:i + cohort_chunk_size],
+                cohorts_range=ga4_types.CohortsRange(granularity=granularity, end_offset=end_offset),
+            )
         )
-    )
-
-    # 요청 실행
-    response = client.run_report(request)
-
-    # DataFrame 준비
-    columns = ['cohort_date'] + [f'{col_name} {n}' for n in range(end_offset + 1)]
-
-    if platform:
-        device_category_dfs = {}
-
-        for row in response.rows:
-            platform_device_category = row.dimension_values[0].value
-            cohort_date = row.dimension_values[1].value  # YYYY-MM 형식으로 변환
-            date_index = int(row.dimension_values[2].value)
-            active_users = int(row.metric_values[0].value)
-
-            if platform_device_category not in device_category_dfs:
-                device_category_dfs[platform_device_category] = {col: [] for col in columns}
-
-            data = device_category_dfs[platform_device_category]
-
-            if cohort_date not in data['cohort_date']:
-                data['cohort_date'].append(cohort_date)
-                for col in columns[1:]:
-                    data[col].append(0)
-
-            data[f'{col_name} {date_index}'][data['cohort_date'].index(cohort_date)] = active_users
-
-        # 각 디바이스 카테고리별로 DataFrame 생성 및 정리
-        for category, data in device_category_dfs.items():
-            df = pd.DataFrame(data).set_index('cohort_date').sort_index()
-            device_category_dfs[category] = df
-        return device_category_dfs
+        for i in range(0, len(cohorts), cohort_chunk_size)
+    ]
 
+    # 요청 실행 (공유 클라이언트로 동시에 실행, 캐시에 있으면 재사용)
+    def fetch(request):
+        return _read_through_cache(request, lambda: _decode_response(_run_report(client, request)), cache)
+
+    frames = []
+    if requests:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(requests)))) as executor:
+            frames = list(executor.map(fetch, requests))
+
+    if incremental:
+        # 재사용한 코호트 + 새로 받은 코호트를 합쳐서 저장 (현재 분석 기간을 벗어난 코호트는 제외)
+        if reusable_labels:
+            frames.insert(0, stored[stored['cohort'].isin(reusable_labels)])
+        report = concat_frames(frames)
+        write_frame(report, stored_path)
+        write_frame(pd.DataFrame({'cohort': sorted(reusable_labels | {cohort.name for cohort in cohorts})}), fetched_path)
     else:
-        # 데이터 저장을 위한 딕셔너리 초기화
-        data = {}
-
-        for row in response.rows:
-            cohort_date = row.dimension_values[0].value  # YYYY-MM 형식으로 변환
-            date_index = int(row.dimension_values[1].value)
-            active_users = int(row.metric_values[0].value)
-
-            if cohort_date not in data:
-                data[cohort_date] = {}
-
-            data[cohort_date][date_index] = active_users
-
-        # 데이터프레임 변환
-        df = pd.DataFrame.from_dict(data, orient='index').fillna(0)
-
-        # 컬럼명 정리 (Month 0, Month 1, ..., Month 12)
-        df.columns = [f"{col_name} {col}" for col in df.columns]
-        df.index.name = "cohort_date"
-
-        # 컬럼 이름을 정렬
-        sorted_columns = sorted(df.columns, key=lambda x: int(x.split(" ")[1]))
-
-        # 정렬된 컬럼 순서로 데이터프레임 재정렬, 인덱스 내림차순으로 정렬
-        df = df[sorted_columns].sort_index()
+        report = concat_frames(frames)
 
-        return df
+    # 코호트 행렬로 변환
+    return _build_cohort_matrix(report, cohort_demention, col_name, end_offset, platform)
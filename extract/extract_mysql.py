@@ -1,61 +1,483 @@
-import mysql.connector
 import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
 from dotenv import load_dotenv
 import pandas as pd
 
+from extract.extract_utils import lazy_import
+from extract.extract_schema import apply_schema, concat_frames
+
+# MySQL, Parquet 관련 라이브러리 (처음 사용할 때 import)
+pooling = lazy_import('mysql.connector.pooling')
+mysql_constants = lazy_import('mysql.connector.constants')
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
 # .env 파일에서 환경 변수 로드
 load_dotenv()
 
 # 환경 변수 불러오기
 mysql_host = os.getenv('MYSQL_HOST')
 mysql_user = os.getenv('MYSQL_USER')
-mysql_password_ = os.getenv('MYSQL_PASSWORD')
+mysql_password = os.getenv('MYSQL_PASSWORD')
 mysql_database = os.getenv('MYSQL_DATABASE')
 
+# 커넥션 풀 설정 (데이터베이스별 풀 하나, mysql.connector 풀 최대 크기는 32)
+MYSQL_POOL_SIZE = min(int(os.getenv('MYSQL_POOL_SIZE', 5)), 32)
+
+_pools = {}
+_pool_slots = {}
+_pools_lock = threading.Lock()
+
+
+def _resolve_database(db_select):
+    """
+    db_select를 실제 데이터베이스 이름으로 바꾸는 함수.
+    환경 변수 MYSQL_DATABASE_<DB_SELECT>가 있으면 그 값을, 없으면 db_select 자체를 사용한다.
+    (db_select가 없으면 MYSQL_DATABASE 사용)
+    """
+    if not db_select:
+        return mysql_database
+    return os.getenv(f'MYSQL_DATABASE_{db_select.upper()}', db_select)
+
+
+def _get_pool(db_select):
+    """db_select에 해당하는 커넥션 풀을 반환하는 함수 (처음 사용할 때 생성)"""
+    database = _resolve_database(db_select)
+
+    with _pools_lock:
+        if database not in _pools:
+            _pools[database] = pooling.MySQLConnectionPool(
+                pool_name=f'pool_{database}',
+                pool_size=MYSQL_POOL_SIZE,
+                host=mysql_host,
+                user=mysql_user,
+                password=mysql_password,
+                database=database,
+                # 세션을 초기화하면 서버의 prepared statement가 사라지므로 반납 시 초기화하지 않음
+                pool_reset_session=False,
+                # 세션을 초기화하지 않으므로 조회마다 바로 커밋해야 열린 트랜잭션(REPEATABLE READ)의
+                # 오래된 스냅샷을 다음 조회가 계속 읽지 않음
+                autocommit=True
+            )
+            # 풀이 비었을 때 예외 대신 반납될 때까지 기다리도록 세마포어 사용
+            _pool_slots[database] = threading.BoundedSemaphore(MYSQL_POOL_SIZE)
+        return _pools[database], _pool_slots[database]
+
+
+class _PooledConnection:
+    """
+    with 문으로 풀에서 커넥션을 빌리고 반납하는 컨텍스트 매니저.
+    빌릴 때 연결 상태를 확인하고, 끊어졌으면 다시 연결한다.
+    """
+
+    def __init__(self, db_select):
+        self._pool, self._slots = _get_pool(db_select)
+        self._connection = None
 
-def fetch_data_from_mysql(query, db_select, params=None):
+    def __enter__(self):
+        self._slots.acquire()
+        try:
+            self._connection = self._pool.get_connection()
+            # 헬스 체크: 오래 쉬어서 끊긴 연결은 재연결
+            self._connection.ping(reconnect=True, attempts=3, delay=1)
+        except Exception:
+            if self._connection is not None:
+                self._connection.close()
+            self._slots.release()
+            raise
+        return self._connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            # close()는 실제로 닫지 않고 풀에 반납
+            self._connection.close()
+        finally:
+            self._slots.release()
+
+
+def get_mysql_connection(db_select):
+    """
+    db_select에 해당하는 풀에서 커넥션을 빌려오는 함수. with 문과 함께 사용.
+
+    Example:
+    >>> with get_mysql_connection('marketing') as connection:
+    ...     cursor = connection.cursor()
+    """
+    return _PooledConnection(db_select)
+
+
+def fetch_data_from_mysql(query, db_select, params=None, schema=None):
     """
     MySQL 데이터베이스에서 데이터를 조회하여 Pandas DataFrame으로 반환하는 함수.
 
     Parameters:
-    - query (str): 실행할 SQL 쿼리 (SQL 파일도 지원)
+    - query (str): 실행할 SQL 쿼리 (SQL 파일도 지원: 'extract' 또는 'extract.sql'처럼 sql/ 폴더의 파일 이름을 넣으면
+                   미리 불러둔 쿼리를 prepared statement로 실행)
     - db_select (str): 사용할 데이터베이스 선택 ('peterpanz', 'cafe', 'marketing', 'peterpanz_marketing')
     - params (tuple): SQL 쿼리에 전달할 파라미터 값 (예: 날짜 범위)
+    - schema (str or dict, optional): 컬럼 dtype 스키마 (config/schema_config.json의 테이블 이름 또는 {컬럼: dtype})
 
     Returns:
     - df (pandas.DataFrame): 조회된 데이터를 포함하는 DataFrame
     """
 
-    # MySQL 데이터베이스 연결
-    connection = mysql.connector.connect(
-        host=mysql_host,
-        user=mysql_user,
-        password=mysql_password,
-        database=mysql_database
-    )
- 
-    # 커서 생성
-    cursor = connection.cursor()
+    # sql/ 폴더에 등록된 쿼리면 prepared statement로 실행
+    if _is_registered_query(query):
+        return run_query(query, db_select, params, schema)
 
-    try:
-        # SQL 쿼리 실행 (파라미터 적용)
-        if params:
-            cursor.execute(query, params)
+    # 데이터베이스별 커넥션 풀에서 연결 빌려오기
+    with get_mysql_connection(db_select) as connection:
+        # 커서 생성
+        cursor = connection.cursor()
+
+        try:
+            # SQL 쿼리 실행 (파라미터 적용)
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
+
+            # 조회된 데이터 가져오기
+            results = cursor.fetchall()
+
+            # 컬럼명 가져오기
+            columns = [column[0] for column in cursor.description]
+
+            # Pandas DataFrame으로 변환
+            df = pd.DataFrame(results, columns=columns)
+
+        finally:
+            # 리소스 정리: 커서 닫기 (연결은 풀에 반납)
+            cursor.close()
+
+    return apply_schema(df, schema)
+
+
+# MySQL 컬럼 타입 → pandas dtype 매핑 (나머지 타입은 object 유지)
+_MYSQL_INT_TYPES = {'TINY', 'SHORT', 'INT24', 'LONG', 'LONGLONG', 'YEAR'}
+_MYSQL_FLOAT_TYPES = {'FLOAT', 'DOUBLE', 'DECIMAL', 'NEWDECIMAL'}
+_MYSQL_DATETIME_TYPES = {'DATE', 'NEWDATE', 'DATETIME', 'TIMESTAMP'}
+
+
+def _mysql_dtypes(description):
+    """cursor.description으로 컬럼별 pandas dtype을 정하는 함수"""
+    dtypes = {}
+    for column in description:
+        name, type_code = column[0], column[1]
+        type_name = mysql_constants.FieldType.get_info(type_code)
+        if type_name in _MYSQL_INT_TYPES:
+            dtypes[name] = 'Int64'
+        elif type_name in _MYSQL_FLOAT_TYPES:
+            dtypes[name] = 'float64'
+        elif type_name in _MYSQL_DATETIME_TYPES:
+            dtypes[name] = 'datetime64[ns]'
+    return dtypes
+
+
+def _rows_to_frame(rows, columns, dtypes, schema=None):
+    """조회한 행(튜플 리스트)을 컬럼 타입이 지정된 DataFrame으로 변환하는 함수 (schema가 있으면 MySQL 타입 대신 스키마 적용)"""
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    for name, dtype in dtypes.items():
+        if dtype == 'datetime64[ns]':
+            df[name] = pd.to_datetime(df[name])
         else:
-            cursor.execute(query)
+            df[name] = df[name].astype(dtype)
+    return apply_schema(df, schema)
 
-        # 조회된 데이터 가져오기
-        results = cursor.fetchall()
 
-        # 컬럼명 가져오기
-        columns = [column[0] for column in cursor.description]
+def stream_data_from_mysql(query, db_select, params=None, chunk_size=50000, schema=None):
+    """
+    MySQL 조회 결과를 chunk_size행씩 DataFrame으로 나눠서 돌려주는 제너레이터 함수.
+
+    버퍼링하지 않는 커서를 사용하므로 전체 결과를 메모리에 올리지 않고,
+    한 번에 최대 chunk_size행만 메모리에 올라간다. 컬럼 타입은 MySQL 컬럼 타입에 맞춰
+    정수(Int64), 실수(float64), 날짜(datetime64)로 지정된다.
+
+    Parameters:
+    - query (str): 실행할 SQL 쿼리
+    - db_select (str): 사용할 데이터베이스 선택
+    - params (tuple): SQL 쿼리에 전달할 파라미터 값 (예: 날짜 범위)
+    - chunk_size (int): 한 번에 가져올 행 수 (기본값: 50000)
+    - schema (str or dict, optional): 컬럼 dtype 스키마 (config/schema_config.json의 테이블 이름 또는 {컬럼: dtype})
+
+    Yields:
+    - pandas.DataFrame: 최대 chunk_size행의 DataFrame
+
+    Example:
+    >>> for chunk in stream_data_from_mysql(query, 'marketing', ('2024-08-01', '2024-08-31')):
+    ...     process(chunk)
+    """
+    with get_mysql_connection(db_select) as connection:
+        cursor = connection.cursor(buffered=False)
 
-        # Pandas DataFrame으로 변환
-        df = pd.DataFrame(results, columns=columns)
+        try:
+            if params:
+                cursor.execute(query, params)
+            else:
+                cursor.execute(query)
 
+            columns = [column[0] for column in cursor.description]
+            dtypes = _mysql_dtypes(cursor.description)
+
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield _rows_to_frame(rows, columns, dtypes, schema)
+
+        finally:
+            # 중간에 멈춘 경우 남은 결과를 비워야 연결을 풀에 반납할 수 있음
+            if connection.unread_result:
+                connection.consume_results()
+            cursor.close()
+
+
+def export_mysql_to_parquet(query, db_select, path, params=None, chunk_size=50000, schema=None):
+    """
+    MySQL 조회 결과를 chunk_size행씩 Parquet 파일에 바로 쓰는 함수.
+    결과 전체를 메모리에 올리지 않으므로 기간이 길어도 메모리 사용량이 일정하다.
+
+    Parameters:
+    - query (str): 실행할 SQL 쿼리
+    - db_select (str): 사용할 데이터베이스 선택
+    - path (str): 저장할 Parquet 파일 경로
+    - params (tuple): SQL 쿼리에 전달할 파라미터 값
+    - chunk_size (int): 한 번에 가져와서 쓸 행 수 (기본값: 50000)
+    - schema (str or dict, optional): 컬럼 dtype 스키마
+
+    Returns:
+    - int: 저장한 전체 행 수
+    """
+    writer = None
+    total_rows = 0
+
+    try:
+        for chunk in stream_data_from_mysql(query, db_select, params, chunk_size, schema):
+            if writer is None:
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                # 첫 청크에서 값이 모두 NULL인 문자열 컬럼은 타입을 알 수 없으므로 string으로 고정
+                schema = pa.schema([
+                    pa.field(field.name, pa.string()) if pa.types.is_null(field.type) else field
+                    for field in schema
+                ])
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            total_rows += len(chunk)
     finally:
-        # 리소스 정리: 커서 및 데이터베이스 연결 닫기
-        cursor.close()
-        connection.close()
+        if writer is not None:
+            writer.close()
+
+    return total_rows
+
+
+def _split_date_range(start_date, end_date, partitions):
+    """
+    start_date ~ end_date(양 끝 포함)를 최대 partitions개의 연속된 날짜 구간으로 나누는 함수.
+    각 구간은 [시작일, 다음 구간 시작일) 형태의 반열린 구간이다. (마지막 구간의 끝은 end_date 다음 날)
+    """
+    start_date = pd.Timestamp(start_date).date()
+    end_date = pd.Timestamp(end_date).date()
+    n_days = (end_date - start_date).days + 1
+    partitions = max(1, min(partitions, n_days))
+
+    ranges = []
+    offset = 0
+    for i in range(partitions):
+        # 남는 날짜는 앞 구간부터 하루씩 더 배정
+        length = n_days // partitions + (1 if i < n_days % partitions else 0)
+        part_start = start_date + timedelta(days=offset)
+        next_start = part_start + timedelta(days=length)
+        ranges.append((part_start.strftime('%Y-%m-%d'), next_start.strftime('%Y-%m-%d')))
+        offset += length
+    return ranges
+
+
+def fetch_data_from_mysql_partitioned(query, db_select, start_date, end_date, partitions=4, max_workers=None, schema=None):
+    """
+    날짜 범위로 조회하는 쿼리를 여러 구간으로 나눠 동시에 실행하고, 날짜 순서대로 합쳐서 반환하는 함수.
+
+    쿼리는 sql/extract_range.sql처럼 `date >= %s AND date < %s` 형태의 파라미터 두 개(시작일, 다음 구간 시작일)를 받아야 한다.
+    구간 경계를 반열린 구간으로 넘기므로 DATETIME/TIMESTAMP 컬럼도 경계일 자정 이후 행이 빠지거나 중복되지 않는다.
+    (`BETWEEN %s AND %s` 쿼리는 경계일 행이 두 구간에 모두 포함되므로 사용하지 않는다)
+    각 구간은 커넥션 풀의 서로 다른 연결에서 실행되므로 긴 기간 백필도 MySQL 스레드 여러 개로 나눠 처리된다.
+
+    Parameters:
+    - query (str): 실행할 SQL 쿼리 (시작일 이상, 종료일 미만 파라미터 두 개)
+    - db_select (str): 사용할 데이터베이스 선택
+    - start_date (str | date): 조회 시작일 (포함)
+    - end_date (str | date): 조회 종료일 (포함)
+    - partitions (int): 나눌 구간 수 (기본값: 4)
+    - max_workers (int): 동시에 실행할 쿼리 수 (기본값: min(partitions, MYSQL_POOL_SIZE))
+    - schema (str or dict, optional): 컬럼 dtype 스키마
+
+    Returns:
+    - df (pandas.DataFrame): 모든 구간의 결과를 날짜 순서대로 합친 DataFrame
+
+    Example:
+    >>> df = fetch_data_from_mysql_partitioned('extract_range', 'marketing', '2024-01-01', '2024-08-31', partitions=8)
+    """
+    ranges = _split_date_range(start_date, end_date, partitions)
+    max_workers = max_workers or min(len(ranges), MYSQL_POOL_SIZE)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # executor.map은 입력 순서대로 결과를 돌려주므로 구간 순서가 유지됨
+        frames = list(executor.map(lambda params: fetch_data_from_mysql(query, db_select, params, schema), ranges))
+
+    # 구간마다 category 범주가 다를 수 있으므로 범주를 합쳐서 이어붙임
+    return concat_frames(frames)
+
+
+# SQL 파일 레지스트리 (sql/ 폴더의 쿼리를 한 번만 읽고 파싱)
+SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'sql')
+
+_queries = None
+_queries_lock = threading.Lock()
+
+# 연결별 prepared statement 커서 캐시 {연결: {'connection_id': ..., 'cursors': {쿼리 이름: 커서}}}
+_prepared_cursors = weakref.WeakKeyDictionary()
+_prepared_lock = threading.Lock()
+
+
+def _strip_sql(text):
+    """
+    SQL 텍스트에서 주석(--, #, /* */)과 끝의 세미콜론을 제거하고, %s 파라미터 개수를 세는 함수.
+    따옴표 안의 문자는 건드리지 않는다.
+
+    Returns:
+    - (str, int): 정리된 SQL, %s 파라미터 개수
+    """
+    result = []
+    placeholders = 0
+    i = 0
+    quote = None
+
+    while i < len(text):
+        char = text[i]
+        if quote:
+            result.append(char)
+            if char == '\\' and i + 1 < len(text):
+                result.append(text[i + 1])
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in ("'", '"', '`'):
+            quote = char
+            result.append(char)
+        elif text.startswith('--', i) or char == '#':
+            # 줄 끝까지 주석
+            end = text.find('\n', i)
+            i = len(text) if end == -1 else end
+            continue
+        elif text.startswith('/*', i):
+            end = text.find('*/', i + 2)
+            i = len(text) if end == -1 else end + 2
+            result.append(' ')
+            continue
+        else:
+            if text.startswith('%s', i):
+                placeholders += 1
+            result.append(char)
+        i += 1
+
+    sql = ''.join(result).strip().rstrip(';').strip()
+    return sql, placeholders
+
+
+def load_queries(sql_dir=SQL_DIR, reload=False):
+    """
+    sql_dir 아래의 .sql 파일을 모두 읽어 {쿼리 이름: {'sql': ..., 'placeholders': ...}} 형태로 반환하는 함수.
+    쿼리 이름은 sql_dir 기준 상대 경로에서 .sql을 뺀 값이다 (예: sql/extract.sql → 'extract').
+    처음 한 번만 파일을 읽고, 이후에는 캐시된 결과를 반환한다 (reload=True이면 다시 읽음).
+    """
+    global _queries
+
+    with _queries_lock:
+        if _queries is None or reload:
+            queries = {}
+            for root, _, files in os.walk(sql_dir):
+                for file_name in sorted(files):
+                    if not file_name.endswith('.sql'):
+                        continue
+                    path = os.path.join(root, file_name)
+                    name = os.path.splitext(os.path.relpath(path, sql_dir))[0].replace(os.sep, '/')
+                    with open(path, 'r', encoding='utf-8') as file:
+                        sql, placeholders = _strip_sql(file.read())
+                    queries[name] = {'sql': sql, 'placeholders': placeholders}
+            _queries = queries
+        return _queries
+
+
+def _query_name(query):
+    name = query[:-len('.sql')] if query.endswith('.sql') else query
+    return name[len('sql/'):] if name.startswith('sql/') else name
+
+
+def _is_registered_query(query):
+    return isinstance(query, str) and _query_name(query) in load_queries()
+
+
+def get_query(name):
+    """등록된 쿼리의 SQL 문자열을 반환하는 함수 (예: get_query('extract'))"""
+    queries = load_queries()
+    name = _query_name(name)
+    if name not in queries:
+        raise KeyError(f"sql 폴더에 '{name}' 쿼리가 없습니다. (등록된 쿼리: {sorted(queries)})")
+    return queries[name]['sql']
+
+
+def _get_prepared_cursor(connection, name, sql):
+    """
+    연결마다 쿼리 이름별 prepared statement 커서를 재사용하는 함수.
+    같은 커서로 같은 SQL을 다시 실행하면 서버에서 다시 파싱(prepare)하지 않는다.
+    재연결 등으로 연결 ID가 바뀌면 이전 커서는 버리고 새로 만든다.
+    """
+    raw_connection = getattr(connection, '_cnx', connection)  # 풀 연결이면 실제 연결 객체 사용
+
+    with _prepared_lock:
+        entry = _prepared_cursors.get(raw_connection)
+        if entry is None or entry['connection_id'] != connection.connection_id:
+            entry = {'connection_id': connection.connection_id, 'cursors': {}}
+            _prepared_cursors[raw_connection] = entry
+
+    cursor = entry['cursors'].get(name)
+    if cursor is None:
+        cursor = connection.cursor(prepared=True)
+        entry['cursors'][name] = cursor
+    return cursor
+
+
+def run_query(name, db_select, params=None, schema=None):
+    """
+    sql/ 폴더에 등록된 쿼리를 prepared statement로 실행해 DataFrame으로 반환하는 함수.
+
+    Parameters:
+    - name (str): 쿼리 이름 (예: 'extract', 'extract.sql')
+    - db_select (str): 사용할 데이터베이스 선택
+    - params (tuple): SQL 쿼리에 전달할 파라미터 값 (개수가 쿼리의 %s 개수와 같아야 함)
+    - schema (str or dict, optional): 컬럼 dtype 스키마
+
+    Returns:
+    - df (pandas.DataFrame): 조회된 데이터를 포함하는 DataFrame
+
+    Example:
+    >>> df = run_query('extract', 'marketing', ('2024-08-01', '2024-08-31'))
+    """
+    name = _query_name(name)
+    sql = get_query(name)
+    params = tuple(params or ())
+
+    expected = load_queries()[name]['placeholders']
+    if len(params) != expected:
+        raise ValueError(f"'{name}' 쿼리는 파라미터 {expected}개가 필요하지만 {len(params)}개가 전달되었습니다.")
+
+    with get_mysql_connection(db_select) as connection:
+        cursor = _get_prepared_cursor(connection, name, sql)
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+        columns = [column[0] for column in cursor.description]
+        dtypes = _mysql_dtypes(cursor.description)
 
-    return df
+    return _rows_to_frame(rows, columns, dtypes, schema)
@@ -0,0 +1,234 @@
+"""
+추출 결과 컬럼 타입(dtype) 레지스트리.
+
+- GA4: 알려진 측정기준/측정항목을 compact dtype으로 매핑한다. (값 종류가 적은 측정기준은 category,
+  사용자·세션 수 같은 개수는 int64, cohortNth*는 int32, 날짜는 datetime64)
+  레지스트리에 없는 측정항목은 응답 헤더의 type_(TYPE_INTEGER 등)으로 정한다.
+- Google Sheets / MySQL: config/schema_config.json의 테이블별 {컬럼: dtype} 설정을 apply_schema로 적용한다.
+"""
+import json
+import os
+import warnings
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# 설정 파일 경로
+SCHEMA_CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'schema_config.json')
+
+# GA4 측정기준 → dtype (등록되지 않은 측정기준은 문자열(object) 유지)
+GA4_DIMENSION_DTYPES = {
+    'date': 'datetime64[ns]',
+    'dateHour': 'datetime64[ns]',
+    'firstSessionDate': 'datetime64[ns]',
+    'platform': 'category',
+    'platformDeviceCategory': 'category',
+    'deviceCategory': 'category',
+    'operatingSystem': 'category',
+    'browser': 'category',
+    'country': 'category',
+    'language': 'category',
+    'sessionSource': 'category',
+    'sessionMedium': 'category',
+    'sessionSourceMedium': 'category',
+    'sessionDefaultChannelGroup': 'category',
+    'firstUserSource': 'category',
+    'firstUserMedium': 'category',
+    'firstUserDefaultChannelGroup': 'category',
+    'eventName': 'category',
+    'newVsReturning': 'category',
+    'cohortNthDay': 'int32',
+    'cohortNthWeek': 'int32',
+    'cohortNthMonth': 'int32',
+}
+
+# GA4 날짜형 측정기준의 문자열 형식
+GA4_DATETIME_FORMATS = {
+    'date': '%Y%m%d',
+    'dateHour': '%Y%m%d%H',
+    'firstSessionDate': '%Y%m%d',
+}
+
+# GA4 측정항목 → dtype (등록되지 않은 측정항목은 응답 헤더의 type_으로 결정)
+GA4_METRIC_DTYPES = {
+    'activeUsers': 'int64',
+    'active1DayUsers': 'int64',
+    'active7DayUsers': 'int64',
+    'active28DayUsers': 'int64',
+    'newUsers': 'int64',
+    'totalUsers': 'int64',
+    'sessions': 'int64',
+    'engagedSessions': 'int64',
+    'screenPageViews': 'int64',
+    'eventCount': 'int64',
+    'conversions': 'int64',
+    'transactions': 'int64',
+    'totalPurchasers': 'int64',
+    'cohortActiveUsers': 'int64',
+    'cohortTotalUsers': 'int64',
+    'totalRevenue': 'float64',
+    'purchaseRevenue': 'float64',
+    'engagementRate': 'float64',
+    'bounceRate': 'float64',
+    'averageSessionDuration': 'float64',
+}
+
+# GA4 MetricType 이름 → dtype (나머지 타입은 float64)
+GA4_METRIC_TYPE_DTYPES = {
+    'TYPE_INTEGER': 'int64',
+}
+
+
+def ga4_dimension_dtype(name):
+    """GA4 측정기준의 dtype을 반환하는 함수 (등록되지 않았으면 None)"""
+    return GA4_DIMENSION_DTYPES.get(name)
+
+
+def ga4_metric_dtype(name, metric_type=None):
+    """GA4 측정항목의 dtype을 반환하는 함수 (레지스트리 → 헤더 type_ 이름 → float64 순서)"""
+    if name in GA4_METRIC_DTYPES:
+        return GA4_METRIC_DTYPES[name]
+    return GA4_METRIC_TYPE_DTYPES.get(metric_type, 'float64')
+
+
+def decode_ga4_dimension(name, values):
+    """GA4 측정기준 문자열 배열(object)을 레지스트리의 dtype으로 한 번에 변환하는 함수"""
+    dtype = ga4_dimension_dtype(name)
+    if dtype is None:
+        return values
+    if dtype.startswith('datetime64'):
+        return pd.to_datetime(values, format=GA4_DATETIME_FORMATS.get(name))
+    if dtype == 'category':
+        return pd.Categorical(values)
+    return values.astype(dtype)
+
+
+def decode_ga4_metric(name, values, metric_type=None):
+    """GA4 측정항목 문자열 배열(object)을 dtype으로 한 번에 변환하는 함수 (정수로 변환할 수 없으면 float64)"""
+    dtype = ga4_metric_dtype(name, metric_type)
+    try:
+        return values.astype(dtype)
+    except ValueError:
+        return values.astype(np.float64)
+
+
+@lru_cache(maxsize=1)
+def load_schema_config(path=SCHEMA_CONFIG_PATH):
+    """config/schema_config.json의 테이블별 스키마를 읽는 함수 (처음 한 번만 읽음)"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as file:
+        return json.load(file).get('tables', {})
+
+
+def get_table_schema(name):
+    """schema_config.json에 등록된 테이블(시트) 스키마 {컬럼: dtype}를 반환하는 함수"""
+    tables = load_schema_config()
+    if name not in tables:
+        raise KeyError(f"schema_config.json에 등록되지 않은 스키마입니다: {name}")
+    return {column: dtype for column, dtype in tables[name].items() if column != 'comment'}
+
+
+def _is_text(series):
+    """문자열 값이 담긴 Series인지 확인하는 함수 (object와 pandas StringDtype 모두 포함)"""
+    if pd.api.types.is_object_dtype(series):
+        return pd.api.types.infer_dtype(series, skipna=True) == 'string'
+    return pd.api.types.is_string_dtype(series)
+
+
+def _to_numeric(series):
+    """문자열 숫자('1,234', '')를 숫자로 변환하는 함수 (변환할 수 없는 값은 NaN)"""
+    if _is_text(series):
+        series = series.str.replace(',', '', regex=False)
+    return pd.to_numeric(series, errors='coerce')
+
+
+def _warn_coerced(column, original, converted, dtype):
+    """
+    변환 전에는 값이 있었는데 변환 후 결측값이 된 칸이 있으면 경고하는 함수.
+    (빈 문자열·공백은 원래 빈 칸으로 보고 경고하지 않음)
+    """
+    blank = original.isna()
+    if _is_text(original):
+        blank |= original.str.strip().eq('').fillna(True).astype(bool)
+    coerced = converted.isna().to_numpy() & ~blank.to_numpy()
+    if coerced.any():
+        examples = original[coerced].astype(str).unique()[:5].tolist()
+        warnings.warn(
+            f"'{column}' 컬럼의 값 {int(coerced.sum())}개를 {dtype}로 변환할 수 없어 결측값으로 바꿨습니다. (예: {examples})"
+        )
+
+
+def _cast(series, dtype, column=None):
+    """
+    Series를 dtype으로 변환하는 함수 (정수 컬럼에 빈 값이 있으면 nullable 정수(Int64 등) 사용).
+    숫자·날짜로 변환할 수 없는 값은 결측값이 되며, 그런 값이 있으면 경고한다.
+    """
+    column = series.name if column is None else column
+    if dtype.startswith('datetime64'):
+        converted = pd.to_datetime(series, errors='coerce')
+        _warn_coerced(column, series, converted, dtype)
+        return converted
+    if dtype == 'category':
+        return series.astype('category')
+    if dtype.lower().startswith(('int', 'uint')):
+        numeric = _to_numeric(series)
+        _warn_coerced(column, series, numeric, dtype)
+        if numeric.isna().any():
+            bits = ''.join(char for char in dtype if char.isdigit())
+            return numeric.astype(('UInt' if dtype.lower().startswith('uint') else 'Int') + bits)
+        return numeric.astype(dtype.lower())
+    if dtype.startswith('float'):
+        numeric = _to_numeric(series)
+        _warn_coerced(column, series, numeric, dtype)
+        return numeric.astype(dtype)
+    return series.astype(dtype)
+
+
+def apply_schema(dataframe, schema):
+    """
+    DataFrame 컬럼을 스키마의 dtype으로 변환하는 함수 (스키마에 있지만 DataFrame에 없는 컬럼은 무시).
+
+    Parameters:
+    - dataframe (pd.DataFrame): 변환할 DataFrame
+    - schema (str or dict): schema_config.json의 테이블 이름 또는 {컬럼: dtype} 딕셔너리 (None이면 그대로 반환)
+
+    Returns:
+    - pd.DataFrame: dtype이 변환된 DataFrame
+
+    Example:
+    >>> df = apply_schema(df, 'marketing_targets')
+    >>> df = apply_schema(df, {'date': 'datetime64[ns]', 'channel': 'category', 'budget': 'int64'})
+    """
+    if schema is None:
+        return dataframe
+    if isinstance(schema, str):
+        schema = get_table_schema(schema)
+
+    for column, dtype in schema.items():
+        if column in dataframe.columns:
+            dataframe[column] = _cast(dataframe[column], dtype, column)
+    return dataframe
+
+
+def concat_frames(frames):
+    """
+    DataFrame들을 이어붙이는 함수.
+    category 컬럼은 범주 목록이 서로 다르면 pd.concat 결과가 object가 되므로, 범주를 합친 뒤 이어붙여 category를 유지한다.
+    """
+    frames = list(frames)
+    if len(frames) > 1:
+        categorical = [
+            column for column in frames[0].columns
+            if isinstance(frames[0][column].dtype, pd.CategoricalDtype)
+        ]
+        if categorical:
+            frames = [frame.copy(deep=False) for frame in frames]
+            for column in categorical:
+                parts = [frame[column].astype('category') for frame in frames if column in frame.columns]
+                dtype = pd.CategoricalDtype(pd.api.types.union_categoricals(parts, ignore_order=True).categories)
+                for frame in frames:
+                    if column in frame.columns:
+                        frame[column] = frame[column].astype(dtype)
+    return pd.concat(frames, ignore_index=True)
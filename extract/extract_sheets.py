@@ -1,101 +1,261 @@
-import gspread
-from google.oauth2 import service_account
+import hashlib
+import json
 import os
+import threading
+from functools import lru_cache
 from dotenv import load_dotenv
 import pandas as pd
 
+from extract.extract_utils import lazy_import, state_path, read_frame, write_frame
+from extract.extract_schema import apply_schema
+
+# Google Sheets 관련 라이브러리 (처음 사용할 때 import)
+gspread = lazy_import('gspread')
+service_account = lazy_import('google.oauth2.service_account')
+
 # 환경 변수 로드
 load_dotenv()
 
-# 서비스 계정 키 파일 경로 가져오기
-key_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
 
-if not key_path:
-    raise FileNotFoundError("환경 변수 'GOOGLE_APPLICATION_CREDENTIALS'가 설정되지 않았습니다.")
+@lru_cache(maxsize=1)
+def get_default_credentials():
+    """
+    GOOGLE_APPLICATION_CREDENTIALS의 서비스 계정 키로 Google Sheets용 Credentials 객체를 만드는 함수.
+    처음 Google Sheets를 사용할 때 한 번만 키 파일을 읽는다.
+    """
+    # 서비스 계정 키 파일 경로 가져오기
+    key_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+
+    if not key_path:
+        raise FileNotFoundError("환경 변수 'GOOGLE_APPLICATION_CREDENTIALS'가 설정되지 않았습니다.")
+
+    # `google-auth`를 사용하여 Credentials 객체 생성
+    return service_account.Credentials.from_service_account_file(key_path, scopes=[
+        "https://spreadsheets.google.com/feeds",
+        "https://www.googleapis.com/auth/spreadsheets.readonly",
+        "https://www.googleapis.com/auth/drive.readonly"
+    ])
+
+
+def __getattr__(name):
+    # 기존 코드의 `default_credentials` 참조도 처음 접근할 때 만들어지도록 함
+    if name == 'default_credentials':
+        return get_default_credentials()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# 인증 정보별 gspread 클라이언트 (프로세스 안에서 재사용)
+_clients = {}
+_clients_lock = threading.Lock()
 
-# `google-auth`를 사용하여 Credentials 객체 생성
-default_credentials = service_account.Credentials.from_service_account_file(key_path, scopes=[
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/spreadsheets.readonly",
-    "https://www.googleapis.com/auth/drive.readonly"
-])
 
 # ✅ gspread 클라이언트 생성 함수
-def get_gspread_client(credentials=default_credentials):
-    """Google Sheets API 인증을 위한 gspread 클라이언트를 생성하는 함수"""
-    return gspread.authorize(credentials)
+def get_gspread_client(credentials=None):
+    """
+    Google Sheets API 인증을 위한 gspread 클라이언트를 반환하는 함수 (credentials가 없으면 기본 서비스 계정 사용).
+    인증 정보별로 한 번만 authorize하고 이후에는 같은 클라이언트를 재사용한다.
+    """
+    if credentials is None:
+        credentials = get_default_credentials()
+    key = id(credentials)
+
+    with _clients_lock:
+        if key not in _clients:
+            # credentials 객체를 같이 보관해 id가 다른 객체에 재사용되지 않도록 함
+            _clients[key] = (credentials, gspread.authorize(credentials))
+        return _clients[key][1]
+
+
+def _modified_time(spreadsheet):
+    """스프레드시트의 마지막 수정 시각(Drive modifiedTime)을 반환하는 함수 (gspread 버전에 따라 API가 다름)"""
+    if hasattr(spreadsheet, 'get_lastUpdateTime'):
+        return spreadsheet.get_lastUpdateTime()
+    return spreadsheet.lastUpdateTime
+
+
+def _snapshot_key(sheet_id, *parts):
+    """스프레드시트 ID와 조회 조건으로 스냅샷 파일 이름을 만드는 함수"""
+    return hashlib.sha256(json.dumps([sheet_id, *parts], ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _load_snapshot(key, modified_time):
+    """
+    저장된 스냅샷이 modified_time 시점의 것이면 {이름: DataFrame}을 반환하는 함수 (없거나 오래됐으면 None).
+    Parquet에는 위치 기반 컬럼명(0, 1, ...)으로 저장돼 있으므로 메타 파일의 실제 컬럼명으로 되돌린다.
+    """
+    meta_path = state_path('sheets', f'{key}.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r', encoding='utf-8') as file:
+        meta = json.load(file)
+    if meta.get('modified_time') != modified_time:
+        return None
+
+    frames = {}
+    for i, (name, columns) in enumerate(meta['sheets']):
+        df = read_frame(state_path('sheets', f'{key}_{i}.parquet'))
+        if df is None:
+            return None
+        df.columns = columns
+        frames[name] = df
+    return frames
+
+
+def _save_snapshot(key, modified_time, frames):
+    """
+    {이름: DataFrame}을 스냅샷으로 저장하는 함수.
+    시트 컬럼명은 비어 있거나 중복될 수 있어 Parquet에는 위치 기반 이름으로 쓰고, 실제 이름은 메타 파일에 기록한다.
+    """
+    sheets = []
+    for i, (name, df) in enumerate(frames.items()):
+        write_frame(df.set_axis([str(j) for j in range(df.shape[1])], axis=1), state_path('sheets', f'{key}_{i}.parquet'))
+        sheets.append([name, list(df.columns)])
+
+    # 메타 파일을 마지막에 교체해 데이터 파일이 모두 저장된 스냅샷만 사용되도록 함
+    meta_path = state_path('sheets', f'{key}.json')
+    tmp_path = f'{meta_path}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as file:
+        json.dump({'modified_time': modified_time, 'sheets': sheets}, file, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
 
 # ✅ Google Sheet 데이터를 불러오는 함수
-def fetch_data_from_google_sheet(sheet_id, sheet_name, range_name, row_number=0):
+def fetch_data_from_google_sheet(sheet_id, sheet_name, range_name, row_number=0, cache=True, schema=None):
     """
     Google Sheets에서 특정 시트(sheet_name)와 범위(range_name)의 데이터를 가져오는 함수.
+    cache=True이면 스프레드시트가 마지막 조회 이후 수정되지 않았을 때 로컬 스냅샷을 반환한다.
 
     Parameters:
     - sheet_id (str): Google Sheets 문서의 ID
     - sheet_name (str): 불러올 시트의 이름
     - range_name (str): 데이터 범위 (예: "A1:C10")
+    - cache (bool): 수정 시각 기반 스냅샷 캐시 사용 여부 (기본값: True)
+    - schema (str or dict, optional): 컬럼 dtype 스키마 (config/schema_config.json의 이름 또는 {컬럼: dtype})
 
     Returns:
     - list: Google Sheets에서 가져온 데이터 리스트
     """
     client = get_gspread_client()
-    sheet = client.open_by_key(sheet_id).worksheet(sheet_name)
+    spreadsheet = client.open_by_key(sheet_id)
+
+    if cache:
+        modified_time = _modified_time(spreadsheet)
+        key = _snapshot_key(sheet_id, sheet_name, range_name, row_number)
+        snapshot = _load_snapshot(key, modified_time)
+        if snapshot is not None:
+            return apply_schema(snapshot[sheet_name], schema)
 
+    sheet = spreadsheet.worksheet(sheet_name)
 
     # Google Sheets 데이터 가져오기
     data = sheet.get(range_name)
 
     # 빈 데이터 처리
     if not data:
-        return pd.DataFrame()  # 데이터가 없을 경우 빈 DataFrame 반환
+        df = pd.DataFrame()  # 데이터가 없을 경우 빈 DataFrame 반환
+    else:
+        # 첫 번째 행을 컬럼명으로 사용
+        columns = data[row_number]
+        rows = data[1:]  # 데이터 값
+
+        # DataFrame 생성
+        df = pd.DataFrame(rows, columns=columns)
+
+    if cache:
+        _save_snapshot(key, modified_time, {sheet_name: df})
+
+    return apply_schema(df, schema)
+
+
 
-    # 첫 번째 행을 컬럼명으로 사용
-    columns = data[row_number]
-    rows = data[1:]  # 데이터 값
+def _column_letter(column_number):
+    """열 번호를 A1 표기법의 열 문자로 바꾸는 함수 (1 → 'A', 26 → 'Z', 27 → 'AA')"""
+    letters = ''
+    while column_number > 0:
+        column_number, remainder = divmod(column_number - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
 
-    # DataFrame 생성
-    df = pd.DataFrame(rows, columns=columns)
 
+def _quote_sheet_name(sheet_name):
+    """A1 범위에 넣을 수 있도록 시트 이름을 작은따옴표로 감싸는 함수 (이름 안의 '는 ''로 변환)"""
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+
+def _values_to_frame(header, rows, width):
+    """헤더와 행 리스트를 width개 열의 DataFrame으로 만드는 함수 (부족한 칸은 빈 문자열로 채움)"""
+    columns = (list(header) + [''] * width)[:width]
+    if not rows:
+        return pd.DataFrame(columns=columns)
+
+    # 길이가 다른 행은 DataFrame 생성 시 None으로 채워지므로 한 번에 열 수를 맞추고 빈 문자열로 변환
+    df = pd.DataFrame(rows).reindex(columns=range(width)).fillna('')
+    df.columns = columns
     return df
 
 
+def _apply_sheet_schemas(sheets_dict, schema):
+    """{시트 이름: 스키마} 설정에 있는 시트만 dtype을 변환하는 함수"""
+    for title, sheet_schema in (schema or {}).items():
+        if title in sheets_dict:
+            sheets_dict[title] = apply_schema(sheets_dict[title], sheet_schema)
+    return sheets_dict
+
 
 # ✅ Sheet 여러 개 한꺼번에 불러오기 함수
-def fetch_all_sheets(sheet_id, row_number, credentials=default_credentials):
+def fetch_all_sheets(sheet_id, row_number, credentials=None, cache=True, schema=None):
     """
     Google Sheets 문서에서 모든 시트를 가져와 DataFrame으로 변환하는 함수.
 
+    모든 시트의 범위를 values_batch_get 한 번으로 요청한다.
+    열 개수는 각 시트 2행의 값 개수를 기준으로 하고, row_number행을 컬럼명으로, 그 아래 행을 데이터로 사용한다.
+
     Parameters:
     - sheet_id (str): Google Sheets 문서의 ID
+    - row_number (int): 컬럼명이 있는 행 번호 (예: 3)
     - credentials (google.oauth2.service_account.Credentials, optional): 인증 정보 (기본값: default_credentials)
+    - cache (bool): 스프레드시트가 수정되지 않았으면 값을 내려받지 않고 로컬 스냅샷을 반환 (기본값: True)
+    - schema (dict, optional): {시트 이름: 스키마 이름 또는 {컬럼: dtype}} (없는 시트는 문자열 그대로)
 
     Returns:
     - dict: {시트 이름: DataFrame} 형태의 딕셔너리
     """
     client = get_gspread_client(credentials)
-    sheets = client.open_by_key(sheet_id)
+    spreadsheet = client.open_by_key(sheet_id)
 
-    sheets_dict = {}  # ✅ dict → sheets_dict로 변경
+    if cache:
+        modified_time = _modified_time(spreadsheet)
+        key = _snapshot_key(sheet_id, row_number)
+        snapshot = _load_snapshot(key, modified_time)
+        if snapshot is not None:
+            return _apply_sheet_schemas(snapshot, schema)
+
+    worksheets = spreadsheet.worksheets()
 
-    for worksheet in sheets.worksheets():
-        sheet_name = worksheet.title
+    # 시트마다 (2행, row_number행부터 끝까지) 두 범위를 한 번에 요청
+    ranges = []
+    for worksheet in worksheets:
+        sheet_range = _quote_sheet_name(worksheet.title)
+        ranges.append(f'{sheet_range}!2:2')
+        ranges.append(f'{sheet_range}!A{row_number}:{_column_letter(worksheet.col_count)}')
 
-        # 열 이름을 가져옴 (A3:R3 범위의 열 이름 데이터)
-        columns = worksheet.get_values(f'A{row_number}:{chr(64 + len(worksheet.row_values(2)))}3')[0]
+    value_ranges = spreadsheet.values_batch_get(ranges).get('valueRanges', [])
 
-        # 시트에서 데이터를 가져옴 (A4:R 범위 데이터)
-        data = worksheet.get_values(f'A{row_number}:{chr(64 + len(worksheet.row_values(2)))}')
+    sheets_dict = {}  # ✅ dict → sheets_dict로 변경
 
-        # 값이 없을 경우 빈 문자열로 대체
-        data = [[cell if cell else '' for cell in row] for row in data]
+    for i, worksheet in enumerate(worksheets):
+        width_row = value_ranges[2 * i].get('values', [[]])[0]
+        values = value_ranges[2 * i + 1].get('values', [])
 
-        # 데이터의 열 수가 부족하면 빈 데이터로 채움
-        expected_columns = len(columns)
-        for row in data:
-            while len(row) < expected_columns:
-                row.append('')
+        header = values[0] if values else []
+        rows = values[1:]
+
+        # 열 개수: 2행의 값 개수 (2행이 비어 있으면 컬럼명 개수)
+        width = len(width_row) or len(header)
 
         # DataFrame 생성 및 딕셔너리에 추가
-        sheets_dict[sheet_name] = pd.DataFrame(data, columns=columns, row_numb=3)
+        sheets_dict[worksheet.title] = _values_to_frame(header, rows, width)
+
+    if cache:
+        _save_snapshot(key, modified_time, sheets_dict)
 
-    return sheets_dict
\ No newline at end of file
+    return _apply_sheet_schemas(sheets_dict, schema)
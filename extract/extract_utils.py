@@ -0,0 +1,228 @@
+import importlib
+import json
+import os
+import random
+import threading
+import time
+from datetime import date
+from typing import Optional
+
+import pandas as pd
+
+class LazyModule:
+    """
+    속성에 처음 접근할 때 실제로 import하는 모듈 대리 객체.
+    GA4 proto, BigQuery, gspread처럼 import 비용이 큰 라이브러리를 실제로 쓰는 순간까지 미루기 위해 사용.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            # import_module은 내부적으로 import 락을 사용하므로 여러 스레드에서 호출해도 안전
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    def __repr__(self):
+        return f'<LazyModule {self._name!r} ({"loaded" if self._module else "not loaded"})>'
+
+
+def lazy_import(name: str) -> LazyModule:
+    """name 모듈을 처음 사용할 때 import하는 LazyModule을 반환하는 함수"""
+    return LazyModule(name)
+
+
+# 데이터 소스 이름 → 추출 모듈 (get_connector로 처음 사용할 때 import)
+CONNECTORS = {
+    'ga4': 'extract.extract_ga4',
+    'bigquery': 'extract.extract_bigquery',
+    'sheets': 'extract.extract_sheets',
+    'mysql': 'extract.extract_mysql',
+}
+
+
+def get_connector(name: str):
+    """
+    데이터 소스 이름('ga4', 'bigquery', 'sheets', 'mysql')에 해당하는 추출 모듈을 반환하는 함수.
+    사용하지 않는 데이터 소스는 import하지 않으므로 실행 시간과 인증 정보 로딩 비용이 들지 않는다.
+
+    Example:
+    >>> ga4 = get_connector('ga4')
+    >>> df = ga4.create_ga4_request('platformDeviceCategory', 'activeUsers', start=7)
+    """
+    if name not in CONNECTORS:
+        raise KeyError(f"알 수 없는 데이터 소스입니다: {name} ({', '.join(CONNECTORS)} 중 선택)")
+    return importlib.import_module(CONNECTORS[name])
+
+
+# 증분 추출 상태(워터마크, 누적 데이터)를 저장하는 폴더
+STATE_DIR = os.getenv('ETL_STATE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.etl_state'))
+
+_watermark_lock = threading.Lock()
+
+
+def state_path(*parts) -> str:
+    """STATE_DIR 아래의 경로를 만들고, 상위 폴더가 없으면 생성하는 함수"""
+    path = os.path.join(STATE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def read_frame(path: str) -> Optional[pd.DataFrame]:
+    """Parquet 파일을 DataFrame으로 읽는 함수 (파일이 없으면 None 반환)"""
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def write_frame(dataframe: pd.DataFrame, path: str):
+    """DataFrame을 Parquet 파일로 저장하는 함수 (임시 파일에 쓴 뒤 교체하므로 중간에 실패해도 기존 파일 유지)"""
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    dataframe.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def load_watermark(key: str) -> Optional[date]:
+    """key에 해당하는 워터마크(마지막으로 추출한 날짜)를 반환하는 함수"""
+    path = state_path('watermarks.json')
+    with _watermark_lock:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r', encoding='utf-8') as file:
+            value = json.load(file).get(key)
+    return date.fromisoformat(value) if value else None
+
+
+def save_watermark(key: str, value: date):
+    """key에 해당하는 워터마크를 저장하는 함수"""
+    path = state_path('watermarks.json')
+    with _watermark_lock:
+        watermarks = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                watermarks = json.load(file)
+        watermarks[key] = value.isoformat()
+
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(watermarks, file, indent=4, sort_keys=True)
+        os.replace(tmp_path, path)
+
+
+# 응답 캐시 설정 (TTL: 초 단위, 최대 크기: 바이트 단위)
+CACHE_TTL = int(os.getenv('ETL_CACHE_TTL', 6 * 60 * 60))
+CACHE_MAX_BYTES = int(os.getenv('ETL_CACHE_MAX_BYTES', 1024 ** 3))
+
+_cache_lock = threading.Lock()
+
+
+def cache_get(key: str, ttl: Optional[int] = CACHE_TTL) -> Optional[pd.DataFrame]:
+    """
+    캐시에서 key에 해당하는 DataFrame을 반환하는 함수.
+    저장된 지 ttl초가 지났으면 만료로 보고 None을 반환한다. (ttl=None이면 만료 없음)
+    """
+    path = state_path('cache', f'{key}.parquet')
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except FileNotFoundError:
+        return None
+
+    if ttl is not None and age > ttl:
+        return None
+
+    try:
+        dataframe = read_frame(path)
+        # 최근 사용 시각 갱신 (용량 초과 시 오래 안 쓴 파일부터 삭제)
+        os.utime(path, (time.time(), os.path.getmtime(path)))
+    except FileNotFoundError:
+        # 읽는 도중 다른 스레드가 삭제한 경우
+        return None
+    return dataframe
+
+
+def cache_put(key: str, dataframe: pd.DataFrame, max_bytes: int = CACHE_MAX_BYTES):
+    """DataFrame을 캐시에 저장하고, 캐시 전체 크기가 max_bytes를 넘으면 오래 안 쓴 파일부터 삭제하는 함수"""
+    path = state_path('cache', f'{key}.parquet')
+    write_frame(dataframe, path)
+
+    with _cache_lock:
+        cache_dir = os.path.dirname(path)
+        entries = []
+        for name in os.listdir(cache_dir):
+            if not name.endswith('.parquet'):
+                continue
+            try:
+                stat = os.stat(os.path.join(cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((max(stat.st_atime, stat.st_mtime), stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= max_bytes:
+                break
+            if name == os.path.basename(path):
+                continue
+            try:
+                os.remove(os.path.join(cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+class TokenBucket:
+    """
+    초당 rate개씩 채워지고 최대 capacity개까지 쌓이는 토큰 버킷 (스레드 안전).
+    acquire()는 토큰이 생길 때까지 기다린다.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    def set_rate(self, rate: float):
+        """토큰이 채워지는 속도를 바꾸는 함수"""
+        with self._lock:
+            self._refill()
+            self._rate = rate
+
+    def acquire(self, tokens: float = 1):
+        """토큰을 tokens개 꺼내는 함수 (부족하면 채워질 때까지 대기)"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self._rate
+            time.sleep(wait)
+
+
+def retry_with_backoff(call, retry_on, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0, on_retry=None):
+    """
+    call()을 실행하고, retry_on 예외가 나면 지수 백오프 + 지터(0 ~ base_delay * 2^n초 무작위 대기) 후 다시 시도하는 함수.
+    max_attempts번 모두 실패하면 마지막 예외를 그대로 발생시킨다.
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return call()
+        except retry_on as error:
+            if attempt == max_attempts:
+                raise
+            if on_retry:
+                on_retry(error)
+            time.sleep(random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1))))
@@ -23,32 +23,88 @@ def load_json_config(file_path):
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config", "etl_config.json")
 DATA_CONFIGS = load_json_config(CONFIG_PATH) # default_start 바꿔서 사용할려면: (CONFIG_PATH, default_start=45)
 
+# 🔹 요청 계획 함수
+MAX_METRICS_PER_REQUEST = 10  # GA4 요청 하나에 넣을 수 있는 측정항목 최대 개수
+
+def _as_list(value):
+    return [value] if isinstance(value, str) else list(value or [])
+
+
+def plan_requests(configs):
+    """
+    측정기준·필터·기간(start) 등 측정항목 외의 설정이 모두 같은 config를 하나의 요청으로 합치는 함수.
+
+    합쳐진 요청은 각 config 측정항목의 합집합을 한 번에 요청하며, 결과는 split_plan_result로
+    config별로 다시 나눈다. (예: DAU(activeUsers) + MAU(active28DayUsers) → 요청 1회)
+    """
+    plans = []
+    open_plans = {}
+
+    for config in configs:
+        metrics = _as_list(config["metrics"])
+        key = json.dumps({k: v for k, v in config.items() if k != "metrics"}, sort_keys=True)
+        plan = open_plans.get(key)
+
+        new_metrics = [m for m in dict.fromkeys(metrics) if plan is None or m not in plan["metrics"]]
+        if plan is None or len(plan["metrics"]) + len(new_metrics) > MAX_METRICS_PER_REQUEST:
+            plan = {**config, "metrics": [], "configs": []}
+            open_plans[key] = plan
+            plans.append(plan)
+
+        plan["metrics"].extend(new_metrics)
+        plan["configs"].append(config)
+
+    return plans
+
+
+def split_plan_result(plan, raw_data):
+    """
+    합쳐진 요청 결과를 [(config, DataFrame), ...] 형태로 config별로 나누는 함수.
+    GA4는 측정항목이 모두 0인 행을 돌려주지 않으므로, 나눈 뒤에도 해당 config의 측정항목이 모두 0인 행은 제거한다.
+    """
+    dimension_columns = [col for col in raw_data.columns if col not in plan["metrics"]]
+    results = []
+
+    for config in plan["configs"]:
+        metrics = _as_list(config["metrics"])
+        data = raw_data[dimension_columns + metrics]
+        if len(metrics) < len(plan["metrics"]):
+            data = data[(data[metrics] != 0).any(axis=1)].reset_index(drop=True)
+        results.append((config, data))
+
+    return results
+
+
 # 🔹 ETL 처리 함수
-def etl_process(config):
-    print(f"🔄 {config['dimensions']} 데이터 처리 중...")
+def etl_process(plan):
+    print(f"🔄 {plan['dimensions']} 데이터 처리 중...")
 
-    # 1️⃣ 데이터 추출 (Extract)
-    dimension_filter = create_dimension_filter(**config["filters"])
+    # 1️⃣ 데이터 추출 (Extract) - 합쳐진 요청을 한 번만 실행
+    dimension_filter = create_dimension_filter(**plan["filters"])
     raw_data = create_ga4_request(
-        dimensions=config["dimensions"],
-        metrics=config["metrics"],
-        start=config["start"],
-        dimension_filter=dimension_filter
+        dimensions=plan["dimensions"],
+        metrics=plan["metrics"],
+        start=plan["start"],
+        dimension_filter=dimension_filter,
+        incremental=plan.get("incremental", False)
     )
 
-    # # 2️⃣ 데이터 변환 (Transform) - 필요하면 변환 적용
-    # transformed_data = process_data(raw_data) if "transform" in config else raw_data
+    for config, data in split_plan_result(plan, raw_data):
+        print(f"   ↳ {config['metrics']}: {len(data)}행 추출")
+
+        # # 2️⃣ 데이터 변환 (Transform) - 필요하면 변환 적용
+        # transformed_data = process_data(data) if "transform" in config else data
 
-    # # 3️⃣ 데이터 적재 (Load)
-    # table_name = "_".join(config["dimensions"])  # 예: 'date_platform_unifiedScreenClass'
-    # load_to_mysql(transformed_data, table_name, DB_CONFIG)
+        # # 3️⃣ 데이터 적재 (Load)
+        # table_name = "_".join(config["dimensions"])  # 예: 'date_platform_unifiedScreenClass'
+        # load_to_mysql(transformed_data, table_name, DB_CONFIG)
 
-    # print(f"✅ {table_name} 데이터 저장 완료!")
+        # print(f"✅ {table_name} 데이터 저장 완료!")
 
 
 # 🔹 병렬 처리 (멀티스레딩)
 if __name__ == "__main__":
     with ThreadPoolExecutor(max_workers=5) as executor:
-        executor.map(etl_process, DATA_CONFIGS)
+        executor.map(etl_process, plan_requests(DATA_CONFIGS))
 
     print("🚀 ETL 파이프라인 완료!")
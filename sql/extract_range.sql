@@ -0,0 +1,4 @@
+-- 날짜 구간 [시작일, 종료일)의 데이터를 가져오는 쿼리 (DATETIME 컬럼도 경계일 행이 빠지지 않음)
+SELECT *
+FROM TB
+WHERE date >= %s AND date < %s;
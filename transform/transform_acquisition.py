@@ -2,3 +2,19 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from extract.extract_ga4 import create_ga4_request, create_dimension_filter, retention
+from transform.transform_kpi import compute_kpis
+
+# 획득 단계 KPI (GA4 측정항목 기준)
+KPI_DEFINITIONS = [
+    {'name': 'total_users', 'column': 'totalUsers'},
+    {'name': 'new_users', 'column': 'newUsers'},
+    {'name': 'sessions', 'column': 'sessions'},
+    {'name': 'engaged_sessions', 'column': 'engagedSessions'},
+    {'name': 'new_user_rate', 'numerator': 'new_users', 'denominator': 'total_users', 'scale': 100},
+    {'name': 'engagement_rate', 'numerator': 'engaged_sessions', 'denominator': 'sessions', 'scale': 100},
+]
+
+
+def calculate_acquisition_kpis(dataframe, by='date', definitions=KPI_DEFINITIONS):
+    """획득 단계 KPI를 by 기준으로 집계하는 함수 (definitions에 KPI를 추가해 함께 계산 가능)"""
+    return compute_kpis(dataframe, definitions, by=by)
@@ -1,6 +1,55 @@
 # transform_activation.py
+import pandas as pd
+
+from transform.transform_kpi import add_kpi_columns, compute_kpis
+
+# 활성화 단계 KPI (신규 사용자 중 활성 사용자 비율)
+ACTIVATION_RATE = {'name': 'activation_rate', 'numerator': 'active_users', 'denominator': 'new_users', 'scale': 100}
+
+KPI_DEFINITIONS = [
+    {'name': 'new_users', 'column': 'new_users'},
+    {'name': 'active_users', 'column': 'active_users'},
+    ACTIVATION_RATE,
+]
+
+
+# 활성화율 계산에 쓰는 (분자, 분모) 컬럼 이름. 앞의 이름을 먼저 찾고, 없으면 transform_utils에서 쓰던 이름을 사용
+ACTIVATION_RATE_COLUMNS = [
+    ('active_users', 'new_users'),
+    ('activated_users', 'total_users'),
+]
+
+
+def _activation_columns(columns):
+    """columns에 있는 활성화율 (분자, 분모) 컬럼 이름을 반환하는 함수 (둘 다 없으면 필요한 컬럼을 알려주는 KeyError)"""
+    for numerator, denominator in ACTIVATION_RATE_COLUMNS:
+        if numerator in columns and denominator in columns:
+            return numerator, denominator
+    required = ' 또는 '.join(f"'{numerator}'/'{denominator}'" for numerator, denominator in ACTIVATION_RATE_COLUMNS)
+    raise KeyError(f"활성화율 계산에는 {required} 컬럼이 필요합니다. (전달된 컬럼: {sorted(map(str, columns))})")
+
+
 def calculate_activation_rate(data):
+    """
+    활성화율(active_users / new_users * 100)을 계산하는 함수.
+    active_users/new_users 컬럼이 없으면 activated_users/total_users 컬럼으로 계산한다. (transform_utils 기존 호출 호환)
+    DataFrame이면 activation_rate 컬럼을 추가해 반환하고(컬럼 단위 계산), 딕셔너리 리스트이면 각 딕셔너리에 값을 넣어 반환한다.
+    분모가 0인 행은 NaN.
+    """
+    if isinstance(data, pd.DataFrame):
+        numerator, denominator = _activation_columns(data.columns)
+        return add_kpi_columns(data, [dict(ACTIVATION_RATE, numerator=numerator, denominator=denominator)])
+
+    if not data:
+        return data
+
+    # 딕셔너리 리스트는 DataFrame으로 바꿨다가 되돌리는 비용이 더 크므로 행 단위로 계산
+    numerator, denominator = _activation_columns(data[0])
     for row in data:
-        row["activation_rate"] = row["active_users"] / row["new_users"] * 100
+        row["activation_rate"] = row[numerator] / row[denominator] * 100 if row[denominator] else float('nan')
     return data
 
+
+def calculate_activation_kpis(dataframe, by='date', definitions=KPI_DEFINITIONS):
+    """활성화 단계 KPI를 by 기준으로 집계하는 함수 (definitions에 KPI를 추가해 함께 계산 가능)"""
+    return compute_kpis(dataframe, definitions, by=by)
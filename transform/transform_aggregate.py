@@ -0,0 +1,286 @@
+# transform_aggregate.py
+"""
+날짜 × 측정기준 집계를 증분으로 유지하는 집계 저장소.
+
+aggregate_by_date는 호출할 때마다 전체 이력을 groupby하지만, AggregateStore는 실행마다 새로 들어오거나
+다시 집계된(restated) 날짜 파티션만 받아서 아래 값을 갱신한다.
+
+- 일별 집계: 월별 Parquet 파일(daily/YYYY-MM.parquet)로 나눠 저장하고, 바뀐 날짜가 있는 월 파일만 읽고 다시 쓴다.
+- 월별 합계: (새 일별 합계 - 기존 일별 합계)를 월 단위 차이로 더해 갱신한다. (이력 재집계 없음)
+- 이동 합계(7일/28일 등): 바뀐 날짜의 영향을 받는 구간(바뀐 날짜 ~ 바뀐 날짜 + 기간 - 1)만 다시 계산한다.
+- 월 누적(MTD) 목표 달성률: 월별 합계와 목표값으로 계산한다.
+
+이동 합계는 더할 수 있는 측정항목(세션, 신규 사용자, 매출 등)에만 의미가 있다.
+7일/28일 활성 사용자처럼 중복을 제거해야 하는 값은 GA4의 active7DayUsers, active28DayUsers를 측정항목으로 저장한다.
+
+Example:
+>>> store = AggregateStore('acquisition', dimensions=['platformDeviceCategory'], metrics=['newUsers', 'sessions'])
+>>> store.update(report)                      # 이번 실행에서 추출한 날짜 파티션
+>>> store.daily(start='2024-05-01')           # newUsers, newUsers_7d, newUsers_28d, ...
+>>> store.target_attainment(targets)          # 월 누적 목표 달성률
+"""
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from extract.extract_utils import state_path, read_frame, write_frame
+from transform.transform_kpi import safe_divide
+
+
+class AggregateStore:
+    """
+    name 폴더(STATE_DIR/aggregates/{name})에 일별·월별 집계를 유지하는 저장소 (스레드 안전).
+
+    Parameters:
+    - name (str): 저장소 이름 (저장 폴더 이름으로 사용)
+    - date_column (str): 날짜 컬럼 이름 (기본값: 'date')
+    - dimensions (list): 날짜와 함께 집계 키로 쓰는 측정기준 컬럼
+    - metrics (list): 합계로 집계할 측정항목 컬럼
+    - rolling_metrics (list, optional): 이동 합계를 유지할 측정항목 (기본값: metrics 전체)
+    - windows (tuple): 이동 합계 기간(일) (기본값: (7, 28))
+    """
+
+    def __init__(self, name, date_column='date', dimensions=None, metrics=None, rolling_metrics=None, windows=(7, 28)):
+        self.name = name
+        self.date_column = date_column
+        self.dimensions = list(dimensions or [])
+        self.metrics = list(metrics or [])
+        self.rolling_metrics = self.metrics if rolling_metrics is None else list(rolling_metrics)
+        self.windows = tuple(windows)
+
+        self._partitions = {}  # 'YYYY-MM' → 해당 월의 일별 집계 DataFrame (읽은 파일만 보관)
+        self._monthly = None
+        self._lock = threading.Lock()
+
+    # --- 저장 경로 ---
+    def _partition_path(self, month):
+        return state_path('aggregates', self.name, 'daily', f'{month}.parquet')
+
+    def _monthly_path(self):
+        return state_path('aggregates', self.name, 'monthly.parquet')
+
+    @property
+    def _keys(self):
+        return [self.date_column] + self.dimensions
+
+    def _rolling_columns(self):
+        return [f'{metric}_{window}d' for window in self.windows for metric in self.rolling_metrics]
+
+    def _empty_daily(self):
+        return pd.DataFrame(columns=self._keys + self.metrics + self._rolling_columns())
+
+    # --- 파티션 읽기/쓰기 ---
+    def _load_partition(self, month):
+        if month not in self._partitions:
+            partition = read_frame(self._partition_path(month))
+            self._partitions[month] = self._empty_daily() if partition is None else partition
+        return self._partitions[month]
+
+    def _load_monthly(self):
+        if self._monthly is None:
+            monthly = read_frame(self._monthly_path())
+            if monthly is None:
+                monthly = pd.DataFrame(columns=['month'] + self.dimensions + self.metrics)
+            self._monthly = monthly.set_index(['month'] + self.dimensions)
+        return self._monthly
+
+    def _known_months(self):
+        """디스크에 저장된 월 + 이번 실행에서 읽거나 새로 만든 월"""
+        directory = os.path.dirname(self._partition_path('0000-00'))
+        stored = {name[:-len('.parquet')] for name in os.listdir(directory) if name.endswith('.parquet')}
+        return stored | set(self._partitions)
+
+    def _concat(self, frames):
+        """빈 DataFrame을 제외하고 합치는 함수 (빈 프레임의 object 컬럼이 날짜 컬럼 dtype을 바꾸지 않도록)"""
+        frames = [frame for frame in frames if not frame.empty]
+        return pd.concat(frames, ignore_index=True) if frames else self._empty_daily()
+
+    @staticmethod
+    def _months_between(start, end):
+        return [str(period) for period in pd.period_range(start, end, freq='M')]
+
+    def _monthly_sums(self, daily):
+        """일별 집계를 (month, 측정기준) 기준 합계로 바꾸는 함수"""
+        month = daily[self.date_column].dt.strftime('%Y-%m')
+        return daily.groupby([month.rename('month')] + [daily[d] for d in self.dimensions], observed=True)[self.metrics].sum()
+
+    # --- 갱신 ---
+    def update(self, dataframe):
+        """
+        새로 추출했거나 다시 집계된 날짜 파티션으로 저장소를 갱신하는 함수.
+
+        dataframe에 들어 있는 날짜는 해당 날짜의 전체 데이터로 보고 기존 값을 교체한다.
+        (dataframe에 없는 날짜의 기존 값은 그대로 유지)
+
+        Returns:
+        - list: 갱신된 날짜 리스트
+        """
+        delta = dataframe[self._keys + self.metrics].copy()
+        delta[self.date_column] = pd.to_datetime(delta[self.date_column]).dt.normalize()
+        new_daily = delta.groupby(self._keys, observed=True, sort=True)[self.metrics].sum().reset_index()
+        if new_daily.empty:
+            return []
+
+        affected = pd.DatetimeIndex(new_daily[self.date_column].unique()).sort_values()
+
+        with self._lock:
+            months = sorted(set(affected.strftime('%Y-%m')))
+            old_daily = self._concat(
+                partition[partition[self.date_column].isin(affected)]
+                for partition in (self._load_partition(month) for month in months)
+            )
+
+            self._apply_monthly_delta(new_daily, old_daily)
+
+            # 바뀐 날짜의 일별 행 교체 (바뀐 월 파일만 다시 씀)
+            new_month = new_daily[self.date_column].dt.strftime('%Y-%m')
+            for month in months:
+                partition = self._partitions[month]
+                kept = partition[~partition[self.date_column].isin(affected)]
+                self._partitions[month] = self._concat([kept, new_daily[new_month == month]])
+
+            touched = set(months)
+            for window in self.windows:
+                touched |= self._update_rolling(affected, window)
+
+            for month in sorted(touched):
+                partition = self._partitions[month].sort_values(self._keys, ignore_index=True)
+                self._partitions[month] = partition
+                write_frame(partition, self._partition_path(month))
+            write_frame(self._monthly.reset_index(), self._monthly_path())
+
+        return list(affected.date)
+
+    def _apply_monthly_delta(self, new_daily, old_daily):
+        """(새 일별 합계 - 기존 일별 합계)를 월별 합계에 더하는 함수"""
+        monthly = self._load_monthly()
+        delta = self._monthly_sums(new_daily)
+        if not old_daily.empty:
+            old_daily[self.date_column] = pd.to_datetime(old_daily[self.date_column])
+            delta = delta.sub(self._monthly_sums(old_daily), fill_value=0)
+
+        existing = delta.index.intersection(monthly.index)
+        if len(existing):
+            monthly.loc[existing, self.metrics] = monthly.loc[existing, self.metrics] + delta.loc[existing, self.metrics]
+
+        added = delta.index.difference(monthly.index)
+        if len(added):
+            monthly = pd.concat([monthly, delta.loc[added, self.metrics]])
+
+        self._monthly = monthly.astype(new_daily[self.metrics].dtypes.to_dict()).sort_index()
+
+    @staticmethod
+    def _affected_spans(dates, window):
+        """바뀐 날짜마다 영향을 받는 이동 합계 구간 [d, d + window - 1]을 겹치는 것끼리 합친 리스트를 반환하는 함수"""
+        spans = []
+        reach = pd.Timedelta(days=window - 1)
+        for day in dates:
+            if spans and day <= spans[-1][1] + pd.Timedelta(days=1):
+                spans[-1][1] = max(spans[-1][1], day + reach)
+            else:
+                spans.append([day, day + reach])
+        return spans
+
+    def _update_rolling(self, affected, window):
+        """바뀐 날짜의 영향을 받는 구간만 window일 이동 합계를 다시 계산하는 함수 (갱신한 월 리스트 반환)"""
+        columns = [f'{metric}_{window}d' for metric in self.rolling_metrics]
+        touched = set()
+        if not columns:
+            return touched
+
+        known = self._known_months()
+        for start, end in self._affected_spans(affected, window):
+            # start 이전 window - 1일까지 읽어야 start의 이동 합계를 계산할 수 있음
+            lower = start - pd.Timedelta(days=window - 1)
+            months = [month for month in self._months_between(lower, end) if month in known]
+            if not months:
+                continue
+
+            span = self._concat(self._load_partition(month) for month in months)
+            span[self.date_column] = pd.to_datetime(span[self.date_column])
+            span = span[(span[self.date_column] >= lower) & (span[self.date_column] <= end)]
+            span = span.sort_values(self.date_column)
+
+            indexed = span.set_index(self.date_column)
+            if self.dimensions:
+                rolled = indexed.groupby(self.dimensions, observed=True, sort=False)[self.rolling_metrics].rolling(f'{window}D').sum()
+                rolled = rolled.reorder_levels(self.dimensions + [self.date_column])
+            else:
+                rolled = indexed[self.rolling_metrics].rolling(f'{window}D').sum()
+            rolled.columns = columns
+
+            # start ~ end 날짜의 행에만 새 값을 기록
+            for month in months:
+                partition = self._partitions[month]
+                dates = pd.to_datetime(partition[self.date_column])
+                target = ((dates >= start) & (dates <= end)).to_numpy()
+                if not target.any():
+                    continue
+                if self.dimensions:
+                    key_frame = partition.loc[target, self.dimensions].assign(**{self.date_column: dates[target]})
+                    keys = pd.MultiIndex.from_frame(key_frame[self.dimensions + [self.date_column]])
+                else:
+                    keys = pd.DatetimeIndex(dates[target])
+                for column in columns:
+                    if column not in partition:
+                        partition[column] = np.nan
+                partition.loc[target, columns] = rolled.reindex(keys).to_numpy()
+                touched.add(month)
+        return touched
+
+    # --- 조회 ---
+    def daily(self, start=None, end=None):
+        """start ~ end 날짜의 일별 집계(이동 합계 포함)를 반환하는 함수 (해당 월 파일만 읽음)"""
+        with self._lock:
+            months = sorted(self._known_months())
+            if start is not None:
+                months = [month for month in months if month >= pd.Timestamp(start).strftime('%Y-%m')]
+            if end is not None:
+                months = [month for month in months if month <= pd.Timestamp(end).strftime('%Y-%m')]
+            if not months:
+                return self._empty_daily()
+            frame = self._concat(self._load_partition(month) for month in months)
+
+        dates = pd.to_datetime(frame[self.date_column])
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= (dates >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (dates <= pd.Timestamp(end)).to_numpy()
+        return frame[mask].reset_index(drop=True)
+
+    def monthly(self):
+        """월별 합계(month, 측정기준, 측정항목)를 반환하는 함수"""
+        with self._lock:
+            return self._load_monthly().reset_index()
+
+    def target_attainment(self, targets, month=None):
+        """
+        월 누적(MTD) 합계의 목표 달성률을 계산하는 함수.
+
+        Parameters:
+        - targets (pd.DataFrame): month('YYYY-MM'), 측정기준 컬럼(선택), 측정항목별 목표값 컬럼
+        - month (str, optional): 계산할 월 (기본값: 가장 최근 월)
+
+        Returns:
+        - pd.DataFrame: month, 측정기준, 측정항목별 {metric}, {metric}_target, {metric}_attainment(%) 컬럼
+        """
+        monthly = self.monthly()
+        if monthly.empty:
+            return monthly
+        month = month or monthly['month'].max()
+        metrics = [metric for metric in self.metrics if metric in targets.columns]
+        keys = ['month'] + [d for d in self.dimensions if d in targets.columns]
+
+        # 목표가 측정기준 일부(또는 월 전체) 기준이면 같은 기준으로 합친 뒤 비교
+        current = monthly[monthly['month'] == month].groupby(keys, observed=True)[metrics].sum().reset_index()
+        result = current.merge(
+            targets[keys + metrics].rename(columns={metric: f'{metric}_target' for metric in metrics}),
+            on=keys,
+            how='left',
+        )
+        for metric in metrics:
+            result[f'{metric}_attainment'] = safe_divide(result[metric], result[f'{metric}_target'], scale=100)
+        return result
@@ -0,0 +1,163 @@
+# transform_kpi.py
+"""
+선언형 KPI 계산 엔진.
+
+KPI는 딕셔너리로 정의하고, compute_kpis가 원본 DataFrame 하나당 groupby 한 번으로 모든 집계 KPI를 계산한 뒤
+비율 KPI를 컬럼 단위로 계산한다. 새 KPI(OMTM, 팀 KPI 등)는 정의만 추가하면 된다.
+
+KPI 정의 형식:
+- 집계: {'name': 'new_users', 'column': 'newUsers', 'agg': 'sum'}
+    - agg: 'sum'(기본값), 'mean', 'min', 'max', 'count', 'nunique'
+    - where: {'firstUserMedium': 'referral'}처럼 조건에 맞는 행만 집계 (값이 리스트이면 그중 하나와 일치)
+- 비율: {'name': 'engagement_rate', 'numerator': 'engaged_sessions', 'denominator': 'sessions', 'scale': 100}
+    - numerator/denominator는 앞에 정의된 KPI 이름이나 원본 컬럼 이름 (원본 컬럼은 합계를 사용)
+    - 분모가 0이면 NaN
+
+Example:
+>>> kpis = [
+...     {'name': 'sessions', 'column': 'sessions'},
+...     {'name': 'engaged_sessions', 'column': 'engagedSessions'},
+...     {'name': 'engagement_rate', 'numerator': 'engaged_sessions', 'denominator': 'sessions', 'scale': 100},
+... ]
+>>> compute_kpis(df, kpis, by='date')
+"""
+import numpy as np
+import pandas as pd
+
+AGGREGATIONS = ('sum', 'mean', 'min', 'max', 'count', 'nunique')
+
+
+def _to_float_array(values):
+    """Series/배열/스칼라를 float64 NumPy 배열로 바꾸는 함수 (nullable 정수의 NA는 NaN으로 변환)"""
+    if isinstance(values, pd.Series):
+        return values.to_numpy(dtype='float64', na_value=np.nan)
+    return np.asarray(values, dtype='float64')
+
+
+def safe_divide(numerator, denominator, scale=1):
+    """
+    numerator / denominator * scale을 컬럼 단위로 계산하는 함수.
+    분모가 0인 행은 ZeroDivisionError나 inf 대신 NaN을 반환한다.
+    """
+    num = _to_float_array(numerator)
+    den = _to_float_array(denominator)
+    num, den = np.broadcast_arrays(num, den)
+
+    result = np.full(num.shape, np.nan)
+    np.divide(num, den, out=result, where=den != 0)
+    if scale != 1:
+        result *= scale
+
+    index = next((s.index for s in (numerator, denominator) if isinstance(s, pd.Series)), None)
+    return pd.Series(result, index=index) if index is not None else result
+
+
+def _as_list(value):
+    return [value] if isinstance(value, str) else list(value or [])
+
+
+def _is_ratio(definition):
+    return 'numerator' in definition
+
+
+def _validate(definitions):
+    """KPI 정의 형식을 확인하는 함수 (잘못된 정의는 ValueError)"""
+    seen = set()
+    for definition in definitions:
+        name = definition.get('name')
+        if not name:
+            raise ValueError(f"KPI 정의에 name이 없습니다: {definition}")
+        if name in seen:
+            raise ValueError(f"KPI 이름이 중복되었습니다: {name}")
+        seen.add(name)
+
+        if _is_ratio(definition):
+            if 'denominator' not in definition:
+                raise ValueError(f"비율 KPI '{name}'에 denominator가 없습니다.")
+        elif 'column' not in definition:
+            raise ValueError(f"KPI '{name}'에 column 또는 numerator/denominator가 없습니다.")
+        elif definition.get('agg', 'sum') not in AGGREGATIONS:
+            raise ValueError(f"KPI '{name}'의 agg는 {', '.join(AGGREGATIONS)} 중 하나여야 합니다.")
+
+
+def _where_mask(dataframe, where):
+    """where 조건({컬럼: 값 또는 값 리스트})에 맞는 행의 불리언 마스크를 만드는 함수"""
+    mask = np.ones(len(dataframe), dtype=bool)
+    for column, value in where.items():
+        if isinstance(value, (list, tuple, set)):
+            mask &= dataframe[column].isin(value).to_numpy()
+        else:
+            mask &= (dataframe[column] == value).to_numpy()
+    return mask
+
+
+def add_kpi_columns(dataframe, definitions):
+    """
+    비율 KPI를 행 단위로 계산해 컬럼으로 추가하는 함수 (집계 없이 각 행의 값으로 계산).
+    numerator/denominator는 dataframe의 컬럼이나 앞에서 추가된 KPI 이름이어야 한다.
+    """
+    _validate(definitions)
+    for definition in definitions:
+        if not _is_ratio(definition):
+            raise ValueError(f"행 단위 계산에는 비율 KPI만 사용할 수 있습니다: {definition['name']}")
+        dataframe[definition['name']] = safe_divide(
+            dataframe[definition['numerator']],
+            dataframe[definition['denominator']],
+            scale=definition.get('scale', 1),
+        )
+    return dataframe
+
+
+def compute_kpis(dataframe, definitions, by=None):
+    """
+    KPI 정의 리스트를 dataframe에 적용해 by 기준으로 집계한 KPI DataFrame을 반환하는 함수.
+
+    필요한 컬럼만 모은 뒤 groupby 한 번으로 모든 집계 KPI를 계산하고, 비율 KPI는 집계 결과에서 정의 순서대로 계산한다.
+
+    Parameters:
+    - dataframe (pd.DataFrame): 원본 데이터
+    - definitions (list[dict]): KPI 정의 리스트 (형식은 모듈 설명 참고)
+    - by (str or list, optional): 집계 기준 컬럼 (None이면 전체를 한 행으로 집계)
+
+    Returns:
+    - pd.DataFrame: by 컬럼 + KPI 이름 컬럼
+    """
+    definitions = list(definitions)
+    _validate(definitions)
+    by = _as_list(by)
+    names = {definition['name'] for definition in definitions}
+
+    # 집계에 필요한 컬럼만 담은 좁은 프레임 (where 조건이 있는 KPI는 조건에 맞지 않는 행을 NaN으로 바꾼 컬럼 사용)
+    columns = {column: dataframe[column] for column in by}
+    aggregations = {}
+    for definition in definitions:
+        if _is_ratio(definition):
+            for operand in (definition['numerator'], definition['denominator']):
+                if operand not in names and operand not in aggregations:
+                    columns.setdefault(operand, dataframe[operand])
+                    aggregations[operand] = (operand, 'sum')
+            continue
+
+        column = definition['column']
+        if 'where' in definition:
+            source = f"__where_{definition['name']}"
+            columns[source] = dataframe[column].where(_where_mask(dataframe, definition['where']))
+        else:
+            source = column
+            columns.setdefault(column, dataframe[column])
+        aggregations[definition['name']] = (source, definition.get('agg', 'sum'))
+
+    frame = pd.DataFrame(columns, index=dataframe.index)
+    keys = by if by else np.zeros(len(frame), dtype=np.int8)
+    result = frame.groupby(keys, sort=True, observed=True, dropna=False).agg(**aggregations)
+
+    for definition in definitions:
+        if _is_ratio(definition):
+            result[definition['name']] = safe_divide(
+                result[definition['numerator']],
+                result[definition['denominator']],
+                scale=definition.get('scale', 1),
+            )
+
+    result = result[[definition['name'] for definition in definitions]]
+    return result.reset_index() if by else result.reset_index(drop=True)
@@ -0,0 +1,14 @@
+# transform_refferal.py
+from transform.transform_kpi import compute_kpis
+
+# 추천 단계 KPI (firstUserMedium 측정기준 + newUsers 측정항목 기준)
+KPI_DEFINITIONS = [
+    {'name': 'new_users', 'column': 'newUsers'},
+    {'name': 'referral_new_users', 'column': 'newUsers', 'where': {'firstUserMedium': 'referral'}},
+    {'name': 'referral_rate', 'numerator': 'referral_new_users', 'denominator': 'new_users', 'scale': 100},
+]
+
+
+def calculate_referral_kpis(dataframe, by='date', definitions=KPI_DEFINITIONS):
+    """추천 단계 KPI를 by 기준으로 집계하는 함수 (definitions에 KPI를 추가해 함께 계산 가능)"""
+    return compute_kpis(dataframe, definitions, by=by)
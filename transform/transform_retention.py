@@ -0,0 +1,93 @@
+# transform_retention.py
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from transform.transform_kpi import compute_kpis, safe_divide
+
+# 리텐션 단계 KPI (cohort_matrix_to_frame으로 만든 코호트 × 기간 프레임 기준)
+KPI_DEFINITIONS = [
+    {'name': 'cohort_users', 'column': 'cohort_users'},
+    {'name': 'retained_users', 'column': 'retained_users'},
+    {'name': 'retention_rate', 'numerator': 'retained_users', 'denominator': 'cohort_users', 'scale': 100},
+]
+
+
+def _elapsed_mask(matrix, as_of=None):
+    """
+    코호트 행렬의 각 칸(코호트 × 기간)이 as_of(기본값: 오늘) 전에 이미 끝난 기간인지 나타내는 불리언 배열을 반환하는 함수.
+
+    extract_ga4.retention은 아직 오지 않은 기간도 0으로 채우므로, 이 마스크로 실제로 지나간 기간만 골라낸다.
+    코호트 라벨과 기간 컬럼 이름은 retention의 형식을 따른다.
+    - 'Day n': 코호트 날짜(YYYY-MM-DD) + n일
+    - 'Week n': 코호트 주(월요일 YYYY-MM-DD ~ 일요일) 마지막 날 + n주
+    - 'Month n': 코호트 월(YYYY-MM) 전달 말일 + n개월 (retention은 라벨 전달을 코호트 기간으로 사용)
+    """
+    if matrix.shape[1] == 0:
+        return np.zeros(matrix.shape, dtype=bool)
+
+    as_of = pd.Timestamp(as_of if as_of is not None else date.today()).normalize()
+    unit = str(matrix.columns[0]).rsplit(' ', 1)[0]
+    periods = [int(str(column).rsplit(' ', 1)[-1]) for column in matrix.columns]
+    labels = pd.to_datetime(matrix.index.astype(str))
+
+    if unit == 'Day':
+        cohort_end = labels
+    elif unit == 'Week':
+        cohort_end = labels + pd.Timedelta(days=6)
+    elif unit == 'Month':
+        cohort_end = labels - pd.Timedelta(days=1)
+    else:
+        raise ValueError(f"코호트 행렬의 기간 컬럼 형식을 알 수 없습니다: {matrix.columns[0]} ('Day n', 'Week n', 'Month n')")
+
+    mask = np.empty((len(matrix.index), len(periods)), dtype=bool)
+    for i, n in enumerate(periods):
+        if unit == 'Day':
+            period_end = cohort_end + pd.Timedelta(days=n)
+        elif unit == 'Week':
+            period_end = cohort_end + pd.Timedelta(weeks=n)
+        else:
+            period_end = cohort_end + pd.Timedelta(days=1) + pd.DateOffset(months=n) - pd.Timedelta(days=1)
+        mask[:, i] = period_end < as_of
+    return mask
+
+
+def cohort_matrix_to_frame(matrix, as_of=None):
+    """
+    extract_ga4.retention이 반환한 코호트 행렬(cohort_date × 'Day 0', 'Day 1', ...)을
+    cohort_date, period, cohort_users(첫 기간 사용자 수), retained_users 컬럼의 세로형 DataFrame으로 바꾸는 함수.
+
+    as_of(기본값: 오늘) 기준으로 아직 끝나지 않은 기간의 칸은 제외한다. (retention이 0으로 채운 칸이
+    기간별 유지율의 분모에 들어가지 않도록)
+    """
+    values = matrix.to_numpy()
+    n_cohorts, n_periods = values.shape
+    periods = np.array([int(str(column).rsplit(' ', 1)[-1]) for column in matrix.columns])
+    elapsed = _elapsed_mask(matrix, as_of).ravel()
+
+    return pd.DataFrame({
+        'cohort_date': np.repeat(matrix.index.to_numpy(), n_periods)[elapsed],
+        'period': np.tile(periods, n_cohorts)[elapsed],
+        'cohort_users': np.repeat(values[:, :1].sum(axis=1), n_periods)[elapsed],
+        'retained_users': values.ravel()[elapsed],
+    })
+
+
+def retention_rate_matrix(matrix, scale=100, as_of=None):
+    """
+    코호트 행렬의 각 칸을 첫 기간(Day 0 등) 사용자 수로 나눈 유지율 행렬을 반환하는 함수.
+    첫 기간 사용자가 0이거나 as_of(기본값: 오늘) 기준으로 아직 끝나지 않은 기간은 NaN.
+    """
+    rates = safe_divide(matrix.to_numpy(), matrix.to_numpy()[:, :1], scale=scale)
+    rates[~_elapsed_mask(matrix, as_of)] = np.nan
+    return pd.DataFrame(rates, index=matrix.index, columns=matrix.columns)
+
+
+def calculate_retention_kpis(matrix, by='period', definitions=KPI_DEFINITIONS, as_of=None):
+    """
+    코호트 행렬에서 리텐션 KPI를 by 기준으로 집계하는 함수.
+    by='period'이면 모든 코호트를 합친 기간별 유지율(코호트 크기 가중)을 계산한다.
+    기간마다 as_of(기본값: 오늘) 전에 그 기간이 끝난 코호트만 분모·분자에 포함한다.
+    """
+    return compute_kpis(cohort_matrix_to_frame(matrix, as_of), definitions, by=by)
@@ -0,0 +1,19 @@
+# transform_revenue.py
+from transform.transform_kpi import compute_kpis
+
+# 수익화 단계 KPI (GA4 측정항목 기준)
+KPI_DEFINITIONS = [
+    {'name': 'active_users', 'column': 'activeUsers'},
+    {'name': 'purchasers', 'column': 'totalPurchasers'},
+    {'name': 'transactions', 'column': 'transactions'},
+    {'name': 'revenue', 'column': 'totalRevenue'},
+    {'name': 'arpu', 'numerator': 'revenue', 'denominator': 'active_users'},
+    {'name': 'arppu', 'numerator': 'revenue', 'denominator': 'purchasers'},
+    {'name': 'purchase_rate', 'numerator': 'purchasers', 'denominator': 'active_users', 'scale': 100},
+    {'name': 'average_order_value', 'numerator': 'revenue', 'denominator': 'transactions'},
+]
+
+
+def calculate_revenue_kpis(dataframe, by='date', definitions=KPI_DEFINITIONS):
+    """수익화 단계 KPI를 by 기준으로 집계하는 함수 (definitions에 KPI를 추가해 함께 계산 가능)"""
+    return compute_kpis(dataframe, definitions, by=by)
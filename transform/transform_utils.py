@@ -1,22 +1,20 @@
+import numpy as np
 import pandas as pd
 
+from transform.transform_kpi import safe_divide, add_kpi_columns  # noqa: F401 (safe_divide는 re-export)
+# 활성화율 정의는 transform_activation 하나만 사용 (기존 import 경로 유지를 위한 re-export)
+from transform.transform_activation import ACTIVATION_RATE, calculate_activation_rate  # noqa: F401
+
 def fill_missing_values(dataframe, column, value):
     """특정 컬럼의 결측값을 채우는 함수"""
     dataframe[column] = dataframe[column].fillna(value)
     return dataframe
 
 def convert_date_format(dataframe, column, old_format, new_format):
-    """날짜 형식을 변환하는 함수"""
-    dataframe[column] = dataframe[column].apply(
-        lambda x: pd.to_datetime(x, format=old_format).strftime(new_format)
-    )
+    """날짜 형식을 변환하는 함수 (컬럼 전체를 한 번에 파싱하고 한 번에 포맷)"""
+    dataframe[column] = pd.to_datetime(dataframe[column], format=old_format).dt.strftime(new_format)
     return dataframe
 
-def calculate_activation_rate(data):
-    """활성화율(Activation Rate)을 계산하는 함수"""
-    data["activation_rate"] = data["activated_users"] / data["total_users"] * 100
-    return data
-
 def remove_duplicates(dataframe, subset_columns):
     """특정 컬럼을 기준으로 중복 제거"""
     return dataframe.drop_duplicates(subset=subset_columns)
@@ -25,3 +23,355 @@ def aggregate_by_date(dataframe, date_column, metrics):
     """날짜별로 데이터를 집계"""
     return dataframe.groupby(date_column)[metrics].sum().reset_index()
 
+
+# Pipeline이 컬럼을 나눠서 처리할 때 한 블록의 행 수 (해시 테이블·임시 배열 크기를 블록 크기로 제한)
+PIPELINE_BLOCK_ROWS = 1 << 17
+
+
+def _factorize_blocks(series, block_rows=PIPELINE_BLOCK_ROWS):
+    """
+    Series를 block_rows행씩 factorize해 (코드 배열, 고유값 Index)를 반환하는 함수 (결측값의 코드는 -1).
+    pd.factorize를 전체에 한 번 부르면 전체 행 수 크기의 해시 테이블을 만들므로,
+    블록마다 factorize한 뒤 블록 고유값을 전체 고유값 번호로 바꿔 이어붙인다.
+    """
+    codes = np.empty(len(series), dtype=np.int64)
+    uniques = pd.Index(series.iloc[:0])
+    for start in range(0, len(series), block_rows):
+        block_codes, block_uniques = pd.factorize(series.iloc[start:start + block_rows])
+        block_uniques = pd.Index(block_uniques)
+        mapping = uniques.get_indexer(block_uniques) if len(uniques) else np.full(len(block_uniques), -1)
+        new = mapping == -1
+        if new.any():
+            mapping[new] = len(uniques) + np.arange(new.sum())
+            uniques = uniques.append(block_uniques[new]) if len(uniques) else block_uniques[new]
+        # 끝에 -1을 붙여서 결측값 코드(-1)는 그대로 -1로 남김
+        codes[start:start + block_rows] = np.append(mapping, -1)[block_codes]
+    return codes, uniques
+
+
+def _group_keys(dataframe, columns, codes_cache):
+    """
+    columns 값 조합마다 0 이상 size 미만의 정수 키 하나를 만들어 (키 배열, size)를 반환하는 함수.
+    결측값도 하나의 값으로 취급하고(drop_duplicates와 같음), 컬럼별 코드는 codes_cache에 저장해 재사용한다.
+    """
+    key, size = None, 1
+    for column in columns:
+        if column not in codes_cache:
+            codes_cache[column] = _factorize_blocks(dataframe[column])
+        codes, uniques = codes_cache[column]
+        cardinality = len(uniques) + 1
+
+        if key is None:
+            key = codes + 1
+        else:
+            if size > np.iinfo(np.int64).max // cardinality:
+                # 키 범위가 int64를 넘으면 지금까지의 키를 실제 조합 번호로 압축
+                key, key_uniques = _factorize_blocks(pd.Series(key, copy=False))
+                size = len(key_uniques)
+            key *= cardinality
+            key += codes
+            key += 1
+        size *= cardinality
+
+    if size > 8 * max(len(key), 1):
+        # 가능한 조합 수가 행 수보다 훨씬 많으면 실제로 나온 조합 번호로 압축 (본 키 표시 배열 크기 제한)
+        key, key_uniques = _factorize_blocks(pd.Series(key, copy=False))
+        size = len(key_uniques)
+    return key, size
+
+
+def _keep_first(key, size, mask=None, block_rows=PIPELINE_BLOCK_ROWS):
+    """
+    키가 처음 나온 행만 True인 마스크를 반환하는 함수 (mask가 False인 행은 건너뜀).
+    본 키는 size 크기의 불리언 배열에 표시하고, 블록 안의 중복은 블록 크기의 해시 테이블로만 찾는다.
+    """
+    seen = np.zeros(size, dtype=bool)
+    keep = np.zeros(len(key), dtype=bool)
+    for start in range(0, len(key), block_rows):
+        block = key[start:start + block_rows]
+        if mask is None:
+            block_keep = ~pd.Series(block, copy=False).duplicated().to_numpy()
+        else:
+            block_mask = mask[start:start + block_rows]
+            block_keep = np.zeros(len(block), dtype=bool)
+            block_keep[block_mask] = ~pd.Series(block[block_mask], copy=False).duplicated().to_numpy()
+        block_keep &= ~seen[block]
+        seen[block[block_keep]] = True
+        keep[start:start + block_rows] = block_keep
+    return keep
+
+
+def _sum_by_codes(dataframe, mask, date_column, metrics, codes_cache, block_rows=PIPELINE_BLOCK_ROWS):
+    """
+    남길 행(mask)의 metrics를 date_column별로 합쳐 groupby(date_column)[metrics].sum()과 같은 DataFrame을 반환하는 함수.
+    행을 복사하지 않고 날짜 코드(codes_cache 재사용)로 블록마다 np.add.at으로 더한다.
+    int64/float64가 아닌 측정값이나 category 날짜 컬럼처럼 groupby와 결과가 달라질 수 있으면 None을 반환한다.
+    """
+    dates = dataframe[date_column]
+    columns = [dataframe[metric] for metric in metrics]
+    if isinstance(dates.dtype, pd.CategoricalDtype) or any(column.dtype not in (np.int64, np.float64) for column in columns):
+        return None
+
+    if date_column not in codes_cache:
+        codes_cache[date_column] = _factorize_blocks(dates)
+    codes, uniques = codes_cache[date_column]
+
+    totals = [np.zeros(len(uniques), dtype=column.dtype) for column in columns]
+    present = np.zeros(len(uniques), dtype=bool)
+    arrays = [column.to_numpy() for column in columns]
+    for start in range(0, len(codes), block_rows):
+        block_codes = codes[start:start + block_rows]
+        valid = block_codes >= 0  # 날짜가 결측값인 행은 groupby처럼 제외
+        if mask is not None:
+            valid &= mask[start:start + block_rows]
+        block_codes = block_codes[valid]
+        present[block_codes] = True
+        for total, values in zip(totals, arrays):
+            block_values = values[start:start + block_rows][valid]
+            if block_values.dtype == np.float64:
+                block_values = np.where(np.isnan(block_values), 0.0, block_values)
+            np.add.at(total, block_codes, block_values)
+
+    selected = np.flatnonzero(present)
+    try:
+        order = selected[uniques[selected].argsort()]
+    except TypeError:
+        # 정렬할 수 없는 날짜 값이 섞여 있으면 groupby에 맡김
+        return None
+    return pd.DataFrame(
+        {metric: total[order] for metric, total in zip(metrics, totals)},
+        index=pd.Index(uniques[order], name=date_column),
+    )
+
+
+class Pipeline:
+    """
+    transform_utils 변환 단계를 바로 실행하지 않고 계획으로 기록했다가, 합칠 수 있는 단계를 합쳐서 한 번에 실행하는 파이프라인.
+
+    - 결측값 채우기: 연속된(또는 사이 단계가 해당 컬럼을 건드리지 않는) fill_missing 단계를 fillna(dict, inplace=True) 한 번으로 합치고,
+      결측값이 없는 컬럼은 건너뛴다.
+    - 중복 제거: 부분 DataFrame을 만들지 않고, 컬럼을 PIPELINE_BLOCK_ROWS행씩 factorize한 코드로 남길 행의 마스크만 계산한다.
+      (전체 행 크기의 해시 테이블을 만들지 않음. 여러 번이면 마스크를 이어서 계산)
+    - 집계: 마지막에 한 번만 실행하며, 집계에 쓰이지 않는 컬럼의 변환 단계는 실행하지 않는다.
+      중복 제거에서 만든 날짜 코드를 재사용해 남길 행을 복사하지 않고 블록마다 더한다. (int64/float64 측정값)
+    - 청크 스트림: 중복 제거는 이전 청크에서 본 행의 해시로 이어서 처리하고, 집계는 청크별 부분합을 마지막에 합친다.
+
+    결측값 채우기·날짜 변환은 기존 함수들처럼 입력 DataFrame의 컬럼을 직접 바꾼다.
+
+    Example:
+    >>> pipeline = (
+    ...     Pipeline()
+    ...     .fill_missing('newUsers', 0)
+    ...     .fill_missing('activeUsers', 0)
+    ...     .drop_duplicates(['date', 'platformDeviceCategory'])
+    ...     .aggregate('date', ['newUsers', 'activeUsers'])
+    ... )
+    >>> pipeline.run(df)
+    >>> pipeline.run_chunks(stream_data_from_mysql(query, 'marketing'))
+    """
+
+    def __init__(self):
+        self._steps = []
+
+    def _add(self, step):
+        if self._steps and self._steps[-1]['op'] == 'aggregate':
+            raise ValueError("aggregate 이후에는 단계를 추가할 수 없습니다.")
+        self._steps.append(step)
+        return self
+
+    # --- 단계 기록 ---
+    def fill_missing(self, column, value):
+        """fill_missing_values와 같은 결측값 채우기 단계를 추가하는 함수"""
+        return self._add({'op': 'fill', 'values': {column: value}})
+
+    def convert_date(self, column, old_format, new_format):
+        """convert_date_format과 같은 날짜 형식 변환 단계를 추가하는 함수"""
+        return self._add({'op': 'convert', 'column': column, 'old_format': old_format, 'new_format': new_format})
+
+    def add_kpis(self, definitions):
+        """add_kpi_columns와 같은 행 단위 비율 KPI 컬럼 추가 단계를 추가하는 함수"""
+        return self._add({'op': 'kpi', 'definitions': list(definitions)})
+
+    def drop_duplicates(self, subset_columns):
+        """remove_duplicates와 같은 중복 제거 단계를 추가하는 함수"""
+        return self._add({'op': 'dedupe', 'subset': list(subset_columns)})
+
+    def aggregate(self, date_column, metrics):
+        """aggregate_by_date와 같은 날짜별 합계 단계를 추가하는 함수 (마지막 단계만 가능)"""
+        return self._add({'op': 'aggregate', 'date_column': date_column, 'metrics': list(metrics)})
+
+    # --- 계획 최적화 ---
+    @staticmethod
+    def _columns(step):
+        """단계가 읽는 컬럼과 쓰는 컬럼을 (inputs, outputs)로 반환하는 함수"""
+        op = step['op']
+        if op == 'fill':
+            return set(step['values']), set(step['values'])
+        if op == 'convert':
+            return {step['column']}, {step['column']}
+        if op == 'kpi':
+            inputs = {c for d in step['definitions'] for c in (d['numerator'], d['denominator'])}
+            return inputs, {d['name'] for d in step['definitions']}
+        if op == 'dedupe':
+            return set(step['subset']), set()
+        return {step['date_column'], *step['metrics']}, set()
+
+    def plan(self):
+        """기록된 단계를 최적화한 실행 계획(단계 리스트)을 반환하는 함수"""
+        steps = self._steps
+
+        # 1) 집계가 있으면 집계에 쓰이지 않는 컬럼의 변환 단계 제거 (뒤에서부터 필요한 컬럼 추적)
+        if steps and steps[-1]['op'] == 'aggregate':
+            needed = set()
+            kept = []
+            for step in reversed(steps):
+                inputs, outputs = self._columns(step)
+                if step['op'] in ('fill', 'convert', 'kpi') and not outputs & needed:
+                    continue
+                needed |= inputs
+                kept.append(step)
+            steps = kept[::-1]
+
+        # 2) 결측값 채우기 합치기: 마지막 fill 묶음 이후 해당 컬럼을 읽거나 쓴 단계가 없으면 그 묶음에 합침
+        planned = []
+        fill_group = None
+        touched = set()
+        for step in steps:
+            if step['op'] == 'fill':
+                columns = set(step['values'])
+                if fill_group is not None and not columns & touched:
+                    for column, value in step['values'].items():
+                        # 같은 컬럼을 두 번 채우면 첫 번째 값만 효과가 있음
+                        fill_group['values'].setdefault(column, value)
+                    continue
+                fill_group = {'op': 'fill', 'values': dict(step['values'])}
+                touched = set()
+                planned.append(fill_group)
+                continue
+
+            inputs, outputs = self._columns(step)
+            touched |= inputs | outputs
+            planned.append(step)
+        return planned
+
+    def explain(self):
+        """최적화한 실행 계획을 사람이 읽을 수 있는 문자열로 반환하는 함수"""
+        lines = []
+        for i, step in enumerate(self.plan(), 1):
+            detail = {key: value for key, value in step.items() if key != 'op'}
+            lines.append(f"{i}. {step['op']} {detail}")
+        return '\n'.join(lines)
+
+    # --- 실행 ---
+    @staticmethod
+    def _apply_column_step(dataframe, step):
+        """행 단위 변환 단계(fill, convert, kpi)를 dataframe에 직접 적용하는 함수"""
+        if step['op'] == 'fill':
+            # 결측값이 없는 컬럼은 건너뜀 (fillna(dict)는 결측값이 없어도 컬럼을 다시 씀)
+            values = {
+                column: value for column, value in step['values'].items()
+                if column in dataframe.columns and dataframe[column].hasnans
+            }
+            if values:
+                dataframe.fillna(values, inplace=True)
+        elif step['op'] == 'convert':
+            convert_date_format(dataframe, step['column'], step['old_format'], step['new_format'])
+        elif step['op'] == 'kpi':
+            add_kpi_columns(dataframe, step['definitions'])
+
+    def _transform(self, dataframe, plan, seen=None, codes_cache=None):
+        """
+        집계 전 단계를 실행하고 남길 행의 마스크(None이면 전체)를 반환하는 함수.
+        seen이 주어지면 중복 제거 단계별로 이전 청크에서 본 행의 해시를 이어서 사용하고,
+        아니면 컬럼별 코드(codes_cache에 저장해 집계에서 재사용)로 블록 단위 중복 제거를 한다.
+        """
+        mask = None
+        dedupe_index = 0
+        codes_cache = {} if codes_cache is None else codes_cache
+        for step in plan:
+            if step['op'] in ('fill', 'convert', 'kpi'):
+                # 행 단위 변환은 행 필터와 순서를 바꿔도 결과가 같으므로 전체 행에 한 번에 적용
+                self._apply_column_step(dataframe, step)
+                for column in self._columns(step)[1]:
+                    codes_cache.pop(column, None)
+            elif step['op'] == 'dedupe':
+                if seen is None:
+                    # 부분 DataFrame을 만들지 않고 컬럼 코드로 첫 등장 행만 남김 (이전 마스크도 함께 적용)
+                    key, size = _group_keys(dataframe, step['subset'], codes_cache)
+                    mask = _keep_first(key, size, mask)
+                    continue
+
+                subset = dataframe[step['subset']] if mask is None else dataframe.loc[mask, step['subset']]
+                hashes = pd.util.hash_pandas_object(subset, index=False).to_numpy()
+                keep = ~pd.Series(hashes).duplicated().to_numpy() & ~np.isin(hashes, seen[dedupe_index])
+                seen[dedupe_index] = np.union1d(seen[dedupe_index], hashes[keep])
+                dedupe_index += 1
+
+                if mask is None:
+                    mask = keep
+                else:
+                    mask[mask] = keep
+        return mask
+
+    @staticmethod
+    def _aggregate(dataframe, mask, step, codes_cache=None):
+        """남길 행의 날짜별 합계를 반환하는 함수 (codes_cache가 있으면 행을 복사하지 않는 _sum_by_codes 먼저 시도)"""
+        if codes_cache is not None:
+            result = _sum_by_codes(dataframe, mask, step['date_column'], step['metrics'], codes_cache)
+            if result is not None:
+                return result
+        columns = [step['date_column']] + step['metrics']
+        source = dataframe if mask is None else dataframe.loc[mask, columns]
+        return source.groupby(step['date_column'])[step['metrics']].sum()
+
+    def run(self, dataframe):
+        """
+        계획을 dataframe 하나에 실행하는 함수.
+        집계 단계가 있으면 날짜별 합계를, 없으면 변환·중복 제거된 DataFrame을 반환한다.
+        """
+        plan = self.plan()
+        if plan and plan[-1]['op'] == 'aggregate':
+            # 중복 제거에서 만든 컬럼 코드(날짜 등)를 집계에서 재사용
+            codes_cache = {}
+            mask = self._transform(dataframe, plan[:-1], codes_cache=codes_cache)
+            return self._aggregate(dataframe, mask, plan[-1], codes_cache).reset_index()
+
+        mask = self._transform(dataframe, plan)
+        return dataframe if mask is None else dataframe[mask]
+
+    def stream(self, chunks):
+        """
+        청크(DataFrame) 스트림에 계획을 실행해 변환·중복 제거된 청크를 하나씩 돌려주는 제너레이터 함수.
+        중복 제거는 이전 청크까지 포함해 적용된다. (집계 단계가 있으면 run_chunks 사용)
+
+        중복 판단은 행 해시(64비트)로 하므로 서로 다른 행의 해시가 같을 확률은 무시할 수 있을 만큼 작다.
+        """
+        plan = self.plan()
+        if plan and plan[-1]['op'] == 'aggregate':
+            raise ValueError("집계 단계가 있는 파이프라인은 run_chunks를 사용하세요.")
+
+        seen = [np.array([], dtype=np.uint64) for step in plan if step['op'] == 'dedupe']
+        for chunk in chunks:
+            mask = self._transform(chunk, plan, seen)
+            yield chunk if mask is None else chunk[mask]
+
+    def run_chunks(self, chunks):
+        """
+        청크(DataFrame) 스트림에 계획을 실행해 하나의 결과를 반환하는 함수.
+        집계 단계가 있으면 청크별 부분합을 마지막에 합치므로, 한 번에 메모리에 올라가는 원본은 청크 하나뿐이다.
+        """
+        plan = self.plan()
+        if not (plan and plan[-1]['op'] == 'aggregate'):
+            frames = list(self.stream(chunks))
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+        aggregate = plan[-1]
+        seen = [np.array([], dtype=np.uint64) for step in plan if step['op'] == 'dedupe']
+        partials = []
+        for chunk in chunks:
+            mask = self._transform(chunk, plan[:-1], seen)
+            partials.append(self._aggregate(chunk, mask, aggregate))
+
+        if not partials:
+            return pd.DataFrame(columns=[aggregate['date_column']] + aggregate['metrics'])
+        return pd.concat(partials).groupby(level=0).sum().reset_index()